@@ -13,6 +13,7 @@ Optionally
 Outputs
   data/epl_dataset.parquet  (master feature table)
   data/epl_dataset.csv      (if --save-csv)
+  data/.cache/              (downloaded CSVs reused across runs; delete to re-download)
 
 Usage
   python build_epl_dataset.py --start 2016-08-01 --end 2025-06-30 --save-csv \
@@ -22,9 +23,12 @@ Usage
 import os
 import io
 import sys
+import hashlib
 import argparse
 import time
 import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Optional, Tuple
 
@@ -39,6 +43,18 @@ FD_BASE = "https://www.football-data.co.uk/mmz4281"
 EPL_FILE = "E0.csv"  # Premier League
 OUTDIR = "data"
 
+# concurrent downloads (ClubElo is capped low to stay clear of 429s)
+FD_WORKERS = 4
+ELO_WORKERS = 4
+HTTP_RETRIES = 3  # attempts per URL, exponential backoff 1s, 2s, ...
+
+PARQUET_OPTS = dict(index=False, engine="pyarrow", compression="zstd",
+                    compression_level=3, use_dictionary=True)
+
+# on-disk cache for finished seasons and settled Elo days
+CACHE_DIR = os.path.join(OUTDIR, ".cache")
+ELO_CACHE_MIN_AGE_DAYS = 7  # recent Elo days can still be revised
+
 BOOKMAKER_PREFIXES_PRIORITY = [
     # typical H2H prefixes present across seasons (opening)
     "PS", "B365", "BW", "IW", "LB", "WH", "VC",
@@ -65,10 +81,68 @@ def iso(dt: datetime) -> str:
     return dt.astimezone(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
 
 
+def iso_series(s: pd.Series) -> pd.Series:
+    # vectorized iso() for tz-aware datetime columns
+    return s.dt.tz_convert("UTC").dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
 def to_dt(s: str) -> datetime:
     return dtparse.isoparse(s).astimezone(timezone.utc)
 
 
+_tls = threading.local()
+
+
+def http_session() -> requests.Session:
+    # one pooled session per worker thread (Session is not shared across threads)
+    sess = getattr(_tls, "session", None)
+    if sess is None:
+        sess = _tls.session = requests.Session()
+    return sess
+
+
+def http_get(url: str, timeout: int = 30) -> Optional[requests.Response]:
+    # retry network errors, 429 and 5xx; other responses are returned as-is
+    r = None
+    for attempt in range(HTTP_RETRIES):
+        try:
+            r = http_session().get(url, timeout=timeout)
+            if r.status_code != 429 and r.status_code < 500:
+                return r
+        except requests.RequestException:
+            r = None
+        if attempt < HTTP_RETRIES - 1:
+            time.sleep(2 ** attempt)
+    return r
+
+
+def cached_get(url: str, cacheable: bool = True) -> Optional[str]:
+    # CSV body for url, read from CACHE_DIR/<sha1(url)>.csv on a hit;
+    # only successful CSV responses are written back
+    path = os.path.join(CACHE_DIR, hashlib.sha1(url.encode()).hexdigest() + ".csv")
+    if cacheable and os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+    r = http_get(url)
+    if r is None or r.status_code != 200 or not r.text or r.text.startswith("<"):
+        return None
+    if cacheable:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(r.text)
+        os.replace(tmp, path)
+    return r.text
+
+
+def read_csv_text(text: str) -> pd.DataFrame:
+    # pyarrow's multithreaded parser; the C parser still copes with ragged rows
+    try:
+        return pd.read_csv(io.BytesIO(text.encode("utf-8")), engine="pyarrow")
+    except Exception:
+        return pd.read_csv(io.StringIO(text))
+
+
 def season_code(year_start: int) -> str:
     y1 = str(year_start % 100).zfill(2)
     y2 = str((year_start + 1) % 100).zfill(2)
@@ -84,46 +158,47 @@ def seasons_covering_range(date_from: datetime, date_to: datetime) -> List[int]:
     return sorted(ys)
 
 
-def safe_float(x):
-    try:
-        return float(x) if x not in (None, "", " ") else None
-    except:
-        return None
+_TEAM_SUBS = {
+    "Man United": "Manchester United",
+    "Man Utd": "Manchester United",
+    "Manchester Utd": "Manchester United",
+    "Man City": "Manchester City",
+    "Wolves": "Wolverhampton",
+    "Spurs": "Tottenham",
+    "West Brom": "West Bromwich Albion",
+    "Brighton and Hove Albion": "Brighton",
+    "Brighton & Hove Albion": "Brighton",
+    "Leeds Utd": "Leeds",
+    "Newcastle Utd": "Newcastle",
+    "Sheffield Utd": "Sheffield United",
+    "Nott'm Forest": "Nottingham Forest",
+    "Nott Forest": "Nottingham Forest",
+    "Bournemouth": "AFC Bournemouth",
+    "Cardiff": "Cardiff City",
+    "Huddersfield": "Huddersfield Town",
+    "Norwich": "Norwich City",
+    "QPR": "Queens Park Rangers",
+    "Swansea": "Swansea City",
+    "Hull": "Hull City",
+    "Birmingham": "Birmingham City",
+    "Leicester": "Leicester City",
+    "Stoke": "Stoke City",
+    "West Ham": "West Ham United",
+    "Tottenham Hotspur": "Tottenham",
+}
 
 
 def normalize_team(name: str) -> str:
     if not isinstance(name, str):
         return name
     s = name.strip()
-    subs = {
-        "Man United": "Manchester United",
-        "Man Utd": "Manchester United",
-        "Manchester Utd": "Manchester United",
-        "Man City": "Manchester City",
-        "Wolves": "Wolverhampton",
-        "Spurs": "Tottenham",
-        "West Brom": "West Bromwich Albion",
-        "Brighton and Hove Albion": "Brighton",
-        "Brighton & Hove Albion": "Brighton",
-        "Leeds Utd": "Leeds",
-        "Newcastle Utd": "Newcastle",
-        "Sheffield Utd": "Sheffield United",
-        "Nott'm Forest": "Nottingham Forest",
-        "Nott Forest": "Nottingham Forest",
-        "Bournemouth": "AFC Bournemouth",
-        "Cardiff": "Cardiff City",
-        "Huddersfield": "Huddersfield Town",
-        "Norwich": "Norwich City",
-        "QPR": "Queens Park Rangers",
-        "Swansea": "Swansea City",
-        "Hull": "Hull City",
-        "Birmingham": "Birmingham City",
-        "Leicester": "Leicester City",
-        "Stoke": "Stoke City",
-        "West Ham": "West Ham United",
-        "Tottenham Hotspur": "Tottenham",
-    }
-    return subs.get(s, s)
+    return _TEAM_SUBS.get(s, s)
+
+
+def normalize_teams(names: pd.Series) -> pd.Series:
+    # column-wise normalize_team: one strip + one dict lookup pass
+    s = names.str.strip()
+    return s.map(_TEAM_SUBS).fillna(s)
 
 
 def fuzzy_match(a: str, choices: List[str]) -> str:
@@ -136,21 +211,43 @@ def fuzzy_match(a: str, choices: List[str]) -> str:
     best = difflib.get_close_matches(a, choices, n=1, cutoff=0.85)
     return best[0] if best else a
 
+
+def fuzzy_match_batch(queries: List[str], choices: List[str]) -> List[str]:
+    # fuzzy_match for many names at once; choices are preprocessed a single time
+    if not queries or not choices:
+        return list(queries)
+    if HAVE_FUZZ:
+        scores = fuzzproc.cdist(queries, choices, scorer=fuzz.WRatio, workers=-1)
+        idx = scores.argmax(axis=1)
+        best = scores[np.arange(len(queries)), idx]
+        return np.where(best >= 85, np.asarray(choices, dtype=object)[idx],
+                        np.asarray(queries, dtype=object)).tolist()
+    return [fuzzy_match(q, choices) for q in queries]
+
 # ================= Football-Data.co.uk (FREE) =====================
 
 
 def load_fdata_season(year_start: int) -> Optional[pd.DataFrame]:
     url = f"{FD_BASE}/{season_code(year_start)}/{EPL_FILE}"
-    r = requests.get(url, timeout=30)
-    if r.status_code != 200:
+    # the running season's file is still updated weekly; only finished ones are cached
+    finished = datetime(year_start + 1, 7, 1, tzinfo=timezone.utc) <= datetime.now(timezone.utc)
+    text = cached_get(url, cacheable=finished)
+    if text is None:
         return None
-    df = pd.read_csv(io.StringIO(r.text))
-    df["SeasonStart"] = year_start
+    df = read_csv_text(text)
+    df["SeasonStart"] = np.int16(year_start)
+    # small dtypes: goals fit int8 (float if blank rows), prices float32
+    for c in ["FTHG", "FTAG"]:
+        if c in df.columns:
+            df[c] = pd.to_numeric(df[c], errors="coerce", downcast="integer")
+    price_cols = [pref+s for pref in list_bookmaker_prefixes(df) for s in "HDA"]
+    df[price_cols] = df[price_cols].apply(
+        pd.to_numeric, errors="coerce").astype("float32")
     if "Date" in df.columns:
         # dates are dayfirst; no explicit kickoff time – we attach noon UTC for determinism
         dt = pd.to_datetime(df["Date"], dayfirst=True, errors="coerce")
-        df["KickoffUTC"] = pd.to_datetime(
-            dt.dt.date.astype(str) + " 12:00:00", utc=True)
+        df["KickoffUTC"] = (dt.dt.normalize().dt.tz_localize("UTC") +
+                            pd.Timedelta(hours=12))
     return df
 
 
@@ -170,29 +267,30 @@ def list_bookmaker_prefixes(df: pd.DataFrame) -> List[str]:
     return prefixes_sorted
 
 
-def melt_odds_triplets(row: pd.Series, pref: str, match_dt: pd.Timestamp) -> List[Dict]:
-    h, d, a = safe_float(
-        row.get(pref+"H")), safe_float(row.get(pref+"D")), safe_float(row.get(pref+"A"))
-    if h is None or d is None or a is None:
-        return []
+def melt_odds_triplets(df: pd.DataFrame, pref: str) -> pd.DataFrame:
+    # one bookmaker prefix -> three tidy rows (home/draw/away) per match
+    cols = [pref+"H", pref+"D", pref+"A"]
+    sub = df[["event_key", "HomeTeam", "AwayTeam", "KickoffUTC"] + cols].copy()
+    sub[cols] = sub[cols].apply(pd.to_numeric, errors="coerce")
+    sub = sub.dropna(subset=cols)
     phase = "close" if pref.endswith("C") else "open"
-    shot_time = match_dt - (timedelta(hours=1) if phase ==
-                            "close" else timedelta(hours=24))
-    base = {
-        "snapshot_time": iso(shot_time.to_pydatetime()),
-        "commence_time": iso(match_dt.to_pydatetime()),
-        "event_key": f"{row['SeasonStart']}-{row['HomeTeam']}-{row['AwayTeam']}-{match_dt.date()}",
-        "home": normalize_team(row["HomeTeam"]),
-        "away": normalize_team(row["AwayTeam"]),
+    shot_time = sub["KickoffUTC"] - (pd.Timedelta(hours=1) if phase ==
+                                     "close" else pd.Timedelta(hours=24))
+    base = pd.DataFrame({
+        "snapshot_time": iso_series(shot_time),
+        "commence_time": iso_series(sub["KickoffUTC"]),
+        "event_key": sub["event_key"],
+        "home": sub["HomeTeam"],
+        "away": sub["AwayTeam"],
         "bookmaker": pref,
         "market": "h2h",
         "phase": phase
-    }
-    return [
-        {**base, "side": "home", "point": None, "price": h},
-        {**base, "side": "draw", "point": None, "price": d},
-        {**base, "side": "away", "point": None, "price": a},
-    ]
+    })
+    return pd.concat([
+        base.assign(side="home", point=None, price=sub[cols[0]]),
+        base.assign(side="draw", point=None, price=sub[cols[1]]),
+        base.assign(side="away", point=None, price=sub[cols[2]]),
+    ], ignore_index=True)
 
 
 def build_odds_from_fdata(df_all: pd.DataFrame, start: datetime, end: datetime) -> Tuple[pd.DataFrame, pd.DataFrame]:
@@ -203,25 +301,23 @@ def build_odds_from_fdata(df_all: pd.DataFrame, start: datetime, end: datetime)
     matches = matches[(matches["KickoffUTC"].notna()) &
                       (matches["KickoffUTC"] >= pd.Timestamp(start)) &
                       (matches["KickoffUTC"] <= pd.Timestamp(end))]
-    matches["HomeTeam"] = matches["HomeTeam"].apply(normalize_team)
-    matches["AwayTeam"] = matches["AwayTeam"].apply(normalize_team)
-    matches["event_key"] = matches.apply(
-        lambda r: f"{r['SeasonStart']}-{r['HomeTeam']}-{r['AwayTeam']}-{r['KickoffUTC'].date()}", axis=1)
+    matches["HomeTeam"] = normalize_teams(matches["HomeTeam"])
+    matches["AwayTeam"] = normalize_teams(matches["AwayTeam"])
+    matches["event_key"] = (matches["SeasonStart"].astype(str) + "-" +
+                            matches["HomeTeam"] + "-" + matches["AwayTeam"] + "-" +
+                            matches["KickoffUTC"].dt.strftime("%Y-%m-%d"))
 
-    # flatten odds triplets
+    # flatten odds triplets: matches keep df_all's index, so odds columns join straight back
     prefixes = list_bookmaker_prefixes(df_all)
-    rows = []
-    for _, r in matches.iterrows():
-        row_full = df_all[(df_all["SeasonStart"].eq(r["SeasonStart"])) &
-                          (df_all["HomeTeam"].eq(r["HomeTeam"])) &
-                          (df_all["AwayTeam"].eq(r["AwayTeam"])) &
-                          (pd.to_datetime(df_all["Date"], dayfirst=True, errors="coerce").dt.date == r["KickoffUTC"].date())]
-        if row_full.empty:
-            continue
-        rf = row_full.iloc[0]
-        for pref in prefixes:
-            rows.extend(melt_odds_triplets(rf, pref, r["KickoffUTC"]))
-    odds = pd.DataFrame(rows)
+    price_cols = [pref+s for pref in prefixes for s in "HDA"]
+    src = matches[["event_key", "HomeTeam", "AwayTeam", "KickoffUTC"]].join(
+        df_all[price_cols])
+    frames = [melt_odds_triplets(src, pref) for pref in prefixes]
+    odds = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    if not odds.empty:
+        # after the concat: per-prefix categoricals would not share categories
+        for c in ["bookmaker", "market", "phase", "side"]:
+            odds[c] = odds[c].astype("category")
     return matches.reset_index(drop=True), odds
 
 # ================= Elo (ClubElo CSV API) =========================
@@ -231,10 +327,12 @@ def fetch_clubelo_by_date(dt: datetime) -> Optional[pd.DataFrame]:
     # ClubElo CSV API: access by date yields full-day ranking table (team, country, elo, from, to)
     # Example in soccerdata docs: http://api.clubelo.com (CSV API by date / by team)
     url = f"http://api.clubelo.com/{dt.date().isoformat()}"
-    r = requests.get(url, timeout=30)
-    if r.status_code != 200 or not r.text or r.text.startswith("<"):
+    settled = dt.date() < (datetime.now(timezone.utc) -
+                           timedelta(days=ELO_CACHE_MIN_AGE_DAYS)).date()
+    text = cached_get(url, cacheable=settled)
+    if text is None:
         return None
-    df = pd.read_csv(io.StringIO(r.text))
+    df = pd.read_csv(io.StringIO(text))
     # expected columns: 'team','country','level','elo','from','to','...'
     for c in ["from", "to"]:
         if c in df.columns:
@@ -246,54 +344,60 @@ def build_elo_table(match_dates: List[pd.Timestamp]) -> pd.DataFrame:
     # de-duplicate by date to keep requests small
     unique_days = sorted({pd.Timestamp(d.date(), tz="UTC")
                          for d in match_dates})
+    with ThreadPoolExecutor(max_workers=ELO_WORKERS) as ex:
+        tables = list(ex.map(fetch_clubelo_by_date,
+                             [d.to_pydatetime() for d in unique_days]))
     frames = []
-    for d in unique_days:
-        df = fetch_clubelo_by_date(d.to_pydatetime())
+    for d, df in zip(unique_days, tables):
         if df is not None and not df.empty:
             df["elo_date"] = d
             frames.append(
                 df[["Club", "Country", "Elo", "From", "To", "elo_date"]])
-        time.sleep(0.1)
     if not frames:
-        return pd.DataFrame(columns=["Club", "Elo", "From", "To", "elo_date"])
-    elo_all = pd.concat(frames, ignore_index=True)
-    # normalize team names
-    elo_all["team_norm"] = elo_all["Club"].apply(normalize_team)
+        elo_all = pd.DataFrame(
+            columns=["club", "elo", "from", "to", "elo_date", "team_norm"])
+    else:
+        elo_all = pd.concat(frames, ignore_index=True)
+        # normalize team names
+        elo_all["team_norm"] = normalize_teams(elo_all["Club"])
 
-    elo_all.columns = elo_all.columns.str.lower()
+        elo_all.columns = elo_all.columns.str.lower()
+    # parse rating intervals once so attach_elo can join on them directly
+    for c in ["from", "to"]:
+        elo_all[c] = pd.to_datetime(elo_all[c], errors="coerce", utc=True)
     return elo_all
 
 
 def attach_elo(matches: pd.DataFrame, elo_all: pd.DataFrame) -> pd.DataFrame:
-    # For each match, pick Elo where match kickoff is within [from, to]
+    # For each match, pick Elo where match kickoff is within [from, to]:
+    # as-of join on the latest interval starting before kickoff, then check its end
     out = matches.copy()
-    out["home_elo"] = np.nan
-    out["away_elo"] = np.nan
-    for idx, r in out.iterrows():
-        ko = pd.Timestamp(r["KickoffUTC"])
-        # candidate rows where ko within range
-        home_rows = elo_all[(elo_all["team_norm"] == r["HomeTeam"]) &
-                            (pd.to_datetime(elo_all["from"], utc=True) <= ko) &
-                            (pd.to_datetime(elo_all["to"], utc=True) >= ko)]
-        away_rows = elo_all[(elo_all["team_norm"] == r["AwayTeam"]) &
-                            (pd.to_datetime(elo_all["from"], utc=True) <= ko) &
-                            (pd.to_datetime(elo_all["to"], utc=True) >= ko)]
-        if not home_rows.empty:
-            out.at[idx, "home_elo"] = home_rows.iloc[0]["elo"]
-        if not away_rows.empty:
-            out.at[idx, "away_elo"] = away_rows.iloc[0]["elo"]
+    # every fetched day repeats the same intervals; keep the first copy of each
+    iv = (elo_all.dropna(subset=["from", "to"])
+          .drop_duplicates(subset=["team_norm", "from"])
+          .sort_values("from")[["team_norm", "from", "to", "elo"]])
+    for side, team_col in [("home", "HomeTeam"), ("away", "AwayTeam")]:
+        q = out[["KickoffUTC", team_col]].rename(columns={team_col: "team_norm"})
+        q["_pos"] = np.arange(len(q))
+        q = q.sort_values("KickoffUTC")
+        res = pd.merge_asof(q, iv, left_on="KickoffUTC", right_on="from",
+                            by="team_norm", direction="backward")
+        # fill by row position, then assign the whole column once
+        elo = np.full(len(out), np.nan)
+        hit = (res["to"] >= res["KickoffUTC"]).to_numpy()
+        elo[res["_pos"].to_numpy()[hit]] = res["elo"].to_numpy(dtype=float)[hit]
+        out[f"{side}_elo"] = elo
     return out
 
 # ================= Feature Engineering ===========================
 
 
 def devig_probs(h, d, a):
-    try:
-        ih, idd, ia = 1/float(h), 1/float(d), 1/float(a)
-        s = ih+idd+ia
-        return ih/s, idd/s, ia/s
-    except:
-        return (np.nan, np.nan, np.nan)
+    # scalars or aligned arrays of decimal odds; missing/invalid prices give NaN
+    with np.errstate(divide="ignore", invalid="ignore"):
+        inv = 1.0 / np.array([h, d, a], dtype=float)
+        s = inv.sum(axis=0)
+        return inv[0]/s, inv[1]/s, inv[2]/s
 
 
 def compute_odds_features(odds: pd.DataFrame) -> pd.DataFrame:
@@ -303,22 +407,18 @@ def compute_odds_features(odds: pd.DataFrame) -> pd.DataFrame:
     # implied
     df["implied"] = np.where(df["price"].notna(), 1.0/df["price"], np.nan)
     # de-vig only for h2h at a given snapshot (event, book, time)
-    h2h = df[df["market"] == "h2h"].copy()
-    if not h2h.empty:
-        def devig_group(g):
-            s = g["implied"].sum()
-            g["devig"] = g["implied"]/s if s and s > 0 else np.nan
-            return g
-        h2h = h2h.groupby(["event_key", "bookmaker", "snapshot_time"],
-                          group_keys=False).apply(devig_group)
-        df = pd.concat([df.drop(h2h.index), h2h], ignore_index=False)
+    is_h2h = df["market"] == "h2h"
+    s = df[is_h2h].groupby(["event_key", "bookmaker", "snapshot_time"], observed=True)[
+        "implied"].transform("sum")
+    df["devig"] = np.nan
+    df.loc[s.index, "devig"] = np.where(s > 0, df.loc[s.index, "implied"]/s, np.nan)
     # pivot to open/close consensus per event
     pivot = df[df["market"] == "h2h"].pivot_table(
         index=["event_key", "bookmaker", "snapshot_time", "phase"],
-        columns="side", values="devig", aggfunc="first"
+        columns="side", values="devig", aggfunc="first", observed=True
     ).reset_index()
     # consensus per event & phase
-    cons = pivot.groupby(["event_key", "phase"])[
+    cons = pivot.groupby(["event_key", "phase"], observed=True)[
         ["home", "draw", "away"]].mean().reset_index()
     cons = cons.rename(columns={"home": "consensus_home",
                        "draw": "consensus_draw", "away": "consensus_away"})
@@ -335,109 +435,83 @@ def compute_odds_features(odds: pd.DataFrame) -> pd.DataFrame:
 
 
 def long_team_table(matches: pd.DataFrame) -> pd.DataFrame:
-    # create per-team rows to compute rolling features
-    rows = []
-    for _, r in matches.iterrows():
-        # home row
-        rows.append({
-            "event_key": r["event_key"],
-            "team": r["HomeTeam"], "opp": r["AwayTeam"],
-            "is_home": 1, "date": r["KickoffUTC"],
-            "gf": r["FTHG"], "ga": r["FTAG"],
-            "result": 1 if r["FTR"] == "H" else (0 if r["FTR"] == "D" else -1),
-            "points": 3 if r["FTR"] == "H" else 1 if r["FTR"] == "D" else 0
-        })
-        # away row
-        rows.append({
-            "event_key": r["event_key"],
-            "team": r["AwayTeam"], "opp": r["HomeTeam"],
-            "is_home": 0, "date": r["KickoffUTC"],
-            "gf": r["FTAG"], "ga": r["FTHG"],
-            "result": 1 if r["FTR"] == "A" else (0 if r["FTR"] == "D" else -1),
-            "points": 3 if r["FTR"] == "A" else 1 if r["FTR"] == "D" else 0
-        })
-    return pd.DataFrame(rows)
+    # create per-team rows to compute rolling features: one home slice, one away slice
+    ftr = matches["FTR"].to_numpy()
+    is_h, is_d, is_a = ftr == "H", ftr == "D", ftr == "A"
+    home = pd.DataFrame({
+        "event_key": matches["event_key"],
+        "team": matches["HomeTeam"], "opp": matches["AwayTeam"],
+        "is_home": 1, "date": matches["KickoffUTC"],
+        "gf": matches["FTHG"], "ga": matches["FTAG"],
+        "result": np.select([is_h, is_d], [1, 0], default=-1),
+        "points": np.select([is_h, is_d], [3, 1], default=0),
+    })
+    away = pd.DataFrame({
+        "event_key": matches["event_key"],
+        "team": matches["AwayTeam"], "opp": matches["HomeTeam"],
+        "is_home": 0, "date": matches["KickoffUTC"],
+        "gf": matches["FTAG"], "ga": matches["FTHG"],
+        "result": np.select([is_a, is_d], [1, 0], default=-1),
+        "points": np.select([is_a, is_d], [3, 1], default=0),
+    })
+    return pd.concat([home, away], ignore_index=True)
+
+
+def roll(s: pd.Series, N: int) -> pd.Series:
+    # mean over the last N values before each row (current row excluded)
+    return s.rolling(N, min_periods=1).mean().shift(1)
 
 
 def rolling_features(team_long: pd.DataFrame, windows=(5, 10)) -> pd.DataFrame:
     tl = team_long.sort_values(["team", "date"]).copy()
     tl["prev_date"] = tl.groupby("team")["date"].shift(1)
     tl["rest_days"] = (tl["date"] - tl["prev_date"]).dt.total_seconds()/86400.0
-    # home/away rolling (last N prior matches)
-    feats = []
+    tl["win"] = (tl["result"] == 1).astype("int8")
+    tl["gd"] = tl["gf"] - tl["ga"]
+
+    def prior_mean(frame: pd.DataFrame, col: str, N: int) -> pd.Series:
+        return frame.groupby("team", sort=False)[col].transform(roll, N)
+
+    # all-venue rolling (last N prior matches)
     for N in windows:
-        g = tl.groupby("team", group_keys=False).apply(
-            lambda x: x.assign(
-                **{
-                    f"form{N}_winrate": x["result"].apply(lambda r: 1 if r == 1 else 0).rolling(N, min_periods=1).mean().shift(1),
-                    f"form{N}_ppg": x["points"].rolling(N, min_periods=1).mean().shift(1),
-                    f"form{N}_gd_avg": (x["gf"]-x["ga"]).rolling(N, min_periods=1).mean().shift(1),
-                }
-            )
-        )
-        feats.append(g)
-    tl = feats[-1]  # last assignment contains all new columns
+        tl[f"form{N}_winrate"] = prior_mean(tl, "win", N)
+        tl[f"form{N}_ppg"] = prior_mean(tl, "points", N)
+        tl[f"form{N}_gd_avg"] = prior_mean(tl, "gd", N)
     # home-only and away-only splits (last 10)
     for side, mask in [("home", tl["is_home"] == 1), ("away", tl["is_home"] == 0)]:
-        part = tl[mask].groupby("team", group_keys=False).apply(
-            lambda x: x.assign(
-                **{
-                    f"{side}10_winrate": x["result"].apply(lambda r: 1 if r == 1 else 0).rolling(10, min_periods=1).mean().shift(1),
-                    f"{side}10_ppg": x["points"].rolling(10, min_periods=1).mean().shift(1),
-                    f"{side}10_gd_avg": (x["gf"]-x["ga"]).rolling(10, min_periods=1).mean().shift(1),
-                }
-            )
-        )
-        tl.loc[part.index, [f"{side}10_winrate", f"{side}10_ppg", f"{side}10_gd_avg"]] = \
-            part[[f"{side}10_winrate", f"{side}10_ppg", f"{side}10_gd_avg"]]
-    return tl
+        part = tl[mask]
+        tl[f"{side}10_winrate"] = prior_mean(part, "win", 10).reindex(tl.index)
+        tl[f"{side}10_ppg"] = prior_mean(part, "points", 10).reindex(tl.index)
+        tl[f"{side}10_gd_avg"] = prior_mean(part, "gd", 10).reindex(tl.index)
+    return tl.drop(columns=["win", "gd"])
 
 
 def h2h_last_k(matches: pd.DataFrame, k=5) -> pd.DataFrame:
     # compute last-k head-to-head results (home POV) before each match
     m = matches.sort_values("KickoffUTC").copy()
-    m["h2h_home_wins"] = np.nan
-    m["h2h_home_draws"] = np.nan
-    m["h2h_home_losses"] = np.nan
-    # index past meetings for quick lookup
-    key = m.apply(lambda r: tuple(
-        sorted([r["HomeTeam"], r["AwayTeam"]])), axis=1)
-    m["_pair"] = key
-    pair_groups = m.groupby("_pair")
-    for pair, grp in pair_groups:
-        grp = grp.sort_values("KickoffUTC")
-        prev = []
-        for idx, r in grp.iterrows():
-            # count last k prior results from home team's perspective
-            hist = [x for x in prev if x["date"] < r["KickoffUTC"]]
-            hist = hist[-k:]
-            w = d = l = 0
-            for h in hist:
-                # perspective of the home team in r
-                if r["HomeTeam"] == h["home"]:
-                    # home was home in that hist
-                    res = h["FTR"]
-                    if res == "H":
-                        w += 1
-                    elif res == "D":
-                        d += 1
-                    else:
-                        l += 1
-                else:
-                    # home in r was away in that hist
-                    res = h["FTR"]
-                    if res == "A":
-                        w += 1
-                    elif res == "D":
-                        d += 1
-                    else:
-                        l += 1
-            m.at[idx, "h2h_home_wins"] = w
-            m.at[idx, "h2h_home_draws"] = d
-            m.at[idx, "h2h_home_losses"] = l
-            prev.append({"date": r["KickoffUTC"], "FTR": r["FTR"],
-                        "home": r["HomeTeam"], "away": r["AwayTeam"]})
-    return m.drop(columns=["_pair"])
+    # integer codes: teams, unordered pair, FTR (H=1, D=0, A=-1, missing=2)
+    codes, teams = pd.factorize(np.concatenate(
+        [m["HomeTeam"].to_numpy(), m["AwayTeam"].to_numpy()]))
+    home, away = np.split(codes, 2)
+    team_a = np.minimum(home, away)  # fixed reference side of each pair
+    pair = team_a * len(teams) + np.maximum(home, away)
+    ftr = m["FTR"].to_numpy()
+    ftr = np.select([ftr == "H", ftr == "D", ftr == "A"], [1, 0, -1], default=2).astype("int8")
+    a_home = home == team_a
+    a_win = np.where(a_home, ftr == 1, ftr == -1)
+    b_win = np.where(a_home, ftr == -1, ftr == 1)
+
+    def prior_k(flag: np.ndarray) -> np.ndarray:
+        # number of flagged meetings among the previous k of the same pair
+        c = pd.Series(flag.astype("int32")).groupby(pair).cumsum().groupby(pair)
+        return (c.shift(1, fill_value=0) - c.shift(k + 1, fill_value=0)).to_numpy()
+
+    a_w, b_w = prior_k(a_win), prior_k(b_win)
+    unknown = prior_k(ftr == 2)  # missing FTR counts as a loss, as before
+    m["h2h_home_wins"] = np.where(a_home, a_w, b_w).astype(float)
+    m["h2h_home_draws"] = prior_k(ftr == 0).astype(float)
+    m["h2h_home_losses"] = (np.where(a_home, b_w, a_w) + unknown).astype(float)
+    return m
 
 # ================= Public vs Money Splits (optional) ==============
 
@@ -453,10 +527,10 @@ def load_splits_csv(path: str) -> pd.DataFrame:
     # normalize
     for c in ["home", "away"]:
         if c in df.columns:
-            df[c] = df[c].apply(normalize_team)
+            df[c] = normalize_teams(df[c])
     if "date" in df.columns:
         df["date"] = pd.to_datetime(df["date"], errors="coerce", utc=True)
-        df["date_d"] = df["date"].dt.date
+        df["date_d"] = df["date"].dt.normalize()
     return df
 
 
@@ -495,14 +569,14 @@ def main():
 
     # 1) Load Football-Data seasons & build matches + odds
     seasons = seasons_covering_range(date_from, date_to)
+    with ThreadPoolExecutor(max_workers=FD_WORKERS) as ex:
+        loaded = list(ex.map(load_fdata_season, seasons))
     frames = []
-    for y in seasons:
-        df = load_fdata_season(y)
+    for y, df in zip(seasons, loaded):
         if df is not None:
             frames.append(df)
             print(
                 f"Loaded Football-Data season {y}/{(y+1) % 100:02d} ({len(df)} rows)")
-        time.sleep(0.1)
     if not frames:
         print("No Football-Data seasons loaded.", file=sys.stderr)
         sys.exit(2)
@@ -546,7 +620,7 @@ def main():
         splits_raw = load_splits_csv(args.splits_csv)
         splits_agg = aggregate_splits_for_event(splits_raw)
         # merge on (date, home, away) vs our (KickoffUTC.date(), HomeTeam, AwayTeam)
-        matches["date_d"] = matches["KickoffUTC"].dt.date
+        matches["date_d"] = matches["KickoffUTC"].dt.normalize()
         money = matches.merge(
             splits_agg,
             left_on=["date_d", "HomeTeam", "AwayTeam"],
@@ -580,21 +654,24 @@ def main():
             money[["event_key"]+money_cols], on="event_key", how="left")
 
     # label in {home, draw, away}
-    def label_from_ftr(x):
-        return {"H": "home", "D": "draw", "A": "away"}.get(x, None)
-    final["label"] = final["FTR"].map(label_from_ftr)
+    final["label"] = final["FTR"].map({"H": "home", "D": "draw", "A": "away"})
     final["goal_diff"] = final["FTHG"] - final["FTAG"]
 
-    # Save
+    # Save (low-cardinality text columns as categoricals -> dictionary-encoded in parquet)
     os.makedirs(OUTDIR, exist_ok=True)
+    for c in ["HomeTeam", "AwayTeam", "FTR", "label"]:
+        final[c] = final[c].astype("category")
+    for c in ["bookmaker", "market", "phase", "side", "home", "away"]:
+        if c in odds_full.columns:
+            odds_full[c] = odds_full[c].astype("category")
     pq = os.path.join(OUTDIR, "epl_dataset.parquet")
-    final.to_parquet(pq, index=False)
+    final.to_parquet(pq, **PARQUET_OPTS)
     print(f"Saved master dataset: {pq} ({len(final)} rows)")
 
     # Also emit odds row-level table (optional for auditing)
     odds_path = os.path.join(
         OUTDIR, f"epl_odds_rows-{args.start}-{args.end}.parquet")
-    odds_full.to_parquet(odds_path, index=False)
+    odds_full.to_parquet(odds_path, **PARQUET_OPTS)
     print(f"Saved flattened odds rows: {odds_path} ({len(odds_full)} rows)")
 
     # CSV optional
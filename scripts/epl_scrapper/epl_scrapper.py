@@ -11,6 +11,7 @@ Outputs:
   data/odds_timeseries.parquet  - tidy odds rows (with implied + de-vig)
   data/odds_timeseries.csv      - optional CSV
   data/lstm_sequences.npz       - X,y for next-step prediction (per bookmaker)
+  data/.cache/                  - cached HTTP responses (delete to force re-download)
 
 ENV:
   APIFOOTBALL_KEY=<api_football_key>  (optional; enables API-Football pulls)
@@ -29,12 +30,27 @@ import time
 import sys
 import argparse
 import re
+import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from dateutil import parser as dtparse
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, Tuple, Callable
 import requests
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+# optional: multi-threaded CSV parser if installed
+try:
+    import polars as pl
+    HAVE_POLARS = True
+except Exception:
+    HAVE_POLARS = False
 
 # -------------------- helpers
 
@@ -53,6 +69,51 @@ def rate_limit_sleep(seconds=0.5):
     time.sleep(seconds)
 
 
+_tls = threading.local()
+
+
+def http_session() -> requests.Session:
+    # one pooled keep-alive session per worker thread
+    sess = getattr(_tls, "session", None)
+    if sess is None:
+        sess = _tls.session = requests.Session()
+    return sess
+
+
+# on-disk HTTP cache: finished seasons never change, live data is reused for an hour
+# (main() points CACHE_DIR inside the output dir, or at --cache-dir)
+CACHE_DIR = os.path.join("data", ".cache")
+FOREVER = float("inf")
+LIVE_MAX_AGE = 3600  # seconds
+
+
+def season_finished(year_start: int) -> bool:
+    return datetime(year_start + 1, 7, 1, tzinfo=timezone.utc) <= datetime.now(timezone.utc)
+
+
+def cached_get(url: str, max_age: float, params: Optional[Dict[str, Any]] = None,
+               headers: Optional[Dict[str, str]] = None,
+               valid: Optional[Callable[[str], bool]] = None) -> Tuple[int, str]:
+    # (status, body); 200 bodies passing `valid` are stored under CACHE_DIR keyed by
+    # sha1 of the full URL (headers such as API keys are not part of the key)
+    key = requests.Request("GET", url, params=params).prepare().url
+    path = os.path.join(CACHE_DIR, hashlib.sha1(key.encode()).hexdigest())
+    try:
+        if time.time() - os.path.getmtime(path) < max_age:
+            with open(path, encoding="utf-8") as f:
+                return 200, f.read()
+    except OSError:
+        pass
+    r = http_session().get(url, params=params, headers=headers, timeout=30)
+    if r.status_code == 200 and (valid is None or valid(r.text)):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(r.text)
+        os.replace(tmp, path)
+    return r.status_code, r.text
+
+
 def season_code(year_start: int) -> str:
     y1 = str(year_start % 100).zfill(2)
     y2 = str((year_start + 1) % 100).zfill(2)
@@ -80,14 +141,34 @@ def safe_float(x):
 
 FD_BASE = "https://www.football-data.co.uk/mmz4281"
 EPL_FILE = "E0.csv"  # Premier League
+FD_WORKERS = 8  # seasons downloaded concurrently
+FD_BASE_COLS = {"Date", "HomeTeam", "AwayTeam", "FTHG", "FTAG", "FTR"}
+HDA_RE = re.compile(r"[HDA]$")
+
+
+def fd_keep_col(c: str) -> bool:
+    # only the columns tidy_from_fdata reads: match basics + any *H/*D/*A price column
+    return c in FD_BASE_COLS or HDA_RE.search(c) is not None
 
 
 def load_fdata_season(year_start: int) -> Optional[pd.DataFrame]:
     url = f"{FD_BASE}/{season_code(year_start)}/{EPL_FILE}"
-    r = requests.get(url, timeout=30)
-    if r.status_code != 200:
+    status, text = cached_get(url, FOREVER if season_finished(year_start) else LIVE_MAX_AGE,
+                              valid=lambda t: bool(t) and not t.startswith("<"))
+    if status != 200:
         return None
-    df = pd.read_csv(io.StringIO(r.text))
+    df = None
+    if HAVE_POLARS:
+        try:
+            content = text.encode("utf-8")
+            header = pl.read_csv(content, n_rows=0, encoding="utf8-lossy").columns
+            df = pl.read_csv(content, columns=[c for c in header if fd_keep_col(c)],
+                             try_parse_dates=False, ignore_errors=True,
+                             encoding="utf8-lossy").to_pandas()
+        except Exception:
+            df = None  # e.g. ragged rows; pandas below is more forgiving
+    if df is None:
+        df = pd.read_csv(io.StringIO(text), usecols=fd_keep_col)
     df["SeasonStart"] = year_start
     # Date can be in different formats across seasons; coerce with dayfirst
     if "Date" in df.columns:
@@ -99,57 +180,65 @@ def load_fdata_season(year_start: int) -> Optional[pd.DataFrame]:
 def list_bookmaker_prefixes(df: pd.DataFrame) -> List[str]:
     # detect prefixes that have H/D/A columns (e.g., B365H,D,A ; B365CH,CD,CA)
     cols = set(df.columns)
-    prefixes = []
-    for c in cols:
-        if len(c) >= 2 and c.endswith("H"):
-            pref = c[:-1]
-            if (pref+"D") in cols and (pref+"A") in cols:
-                prefixes.append(pref)
-    return sorted(prefixes)
+    return sorted({c[:-1] for c in cols
+                   if len(c) >= 2 and c[-1] == "H" and c[:-1]+"D" in cols and c[:-1]+"A" in cols})
 
 
 def tidy_from_fdata(df_all: pd.DataFrame, start: datetime, end: datetime) -> pd.DataFrame:
-    df = df_all.copy()
     # Basic columns may vary by season; guard
     keep_cols = [c for c in ["SeasonStart", "Date", "HomeTeam",
-                             "AwayTeam", "FTHG", "FTAG", "FTR"] if c in df.columns]
-    df = df[keep_cols +
-            [c for c in df.columns if re.match(r".*[HDA]$", c)]].copy()
+                             "AwayTeam", "FTHG", "FTAG", "FTR"] if c in df_all.columns]
+    prefixes = list_bookmaker_prefixes(df_all)
+    price_cols = [pref+s for pref in prefixes for s in "HDA"]
+    df = df_all[keep_cols + price_cols]
 
     df = df[(df["Date"].notna()) & (df["Date"] >= pd.Timestamp(start))
             & (df["Date"] <= pd.Timestamp(end))]
-    prefixes = list_bookmaker_prefixes(df)
-
-    rows = []
-    for _, r in df.iterrows():
-        match_dt = r["Date"].to_pydatetime()
-        commence_time = iso(match_dt)  # no exact kickoff time in CSV
-        for pref in prefixes:
-            h, d, a = safe_float(
-                r.get(pref+"H")), safe_float(r.get(pref+"D")), safe_float(r.get(pref+"A"))
-            if h is None or d is None or a is None:
-                continue
-            phase = "close" if pref.endswith("C") else "open"
-            # e.g., B365, B365C, PS, PSC, AVG, AVGC, MAX, MAXC ...
-            bookmaker = pref
-            # approximate snapshot_time for ordering (open before close)
-            snap_time = match_dt - \
-                (timedelta(hours=1) if phase == "close" else timedelta(hours=24))
-
-            base = {
-                "snapshot_time": iso(snap_time),
-                "commence_time": commence_time,
-                "event_key": f"{r.get('SeasonStart')}-{r.get('HomeTeam')}-{r.get('AwayTeam')}-{match_dt.date()}",
-                "home": r.get("HomeTeam"),
-                "away": r.get("AwayTeam"),
-                "bookmaker": bookmaker,
-                "market": "h2h",
-                "phase": phase,
-            }
-            rows.append({**base, "side": "home", "point": None, "price": h})
-            rows.append({**base, "side": "draw", "point": None, "price": d})
-            rows.append({**base, "side": "away", "point": None, "price": a})
-    return pd.DataFrame(rows)
+    if df.empty or not prefixes:
+        return pd.DataFrame()
+
+    # (match, prefix, side) cube in the same order the row loop produced
+    n, k = len(df), len(prefixes)
+    cube = df[price_cols].apply(pd.to_numeric, errors="coerce").to_numpy(
+        dtype=float).reshape(n, k, 3)
+    # a bookmaker's triplet is only usable when all three prices are present
+    keep = np.repeat(~np.isnan(cube).any(axis=2), 3)
+
+    # built straight as datetimes/categoricals: no ISO strings to re-parse, no object columns
+    match_dt = df["Date"]  # no exact kickoff time in CSV
+    kickoff = match_dt.dt.tz_localize(None).to_numpy()  # UTC wall time
+    is_close = np.array([pref.endswith("C") for pref in prefixes])
+    # approximate snapshot_time for ordering (open before close)
+    offset = np.where(is_close, np.timedelta64(1, "h"), np.timedelta64(24, "h"))
+    snap_time = kickoff[:, None] - offset[None, :]
+    # "<season>-<home>-<away>-<date>" joined in Arrow rather than per-row Python strings
+    event_key = pc.binary_join_element_wise(
+        *(pc.cast(pa.array(df[c], from_pandas=True), pa.string())
+          for c in ["SeasonStart", "HomeTeam", "AwayTeam"]),
+        pc.strftime(pa.array(kickoff), format="%Y-%m-%d"), "-").to_numpy(zero_copy_only=False)
+
+    def per_match(values) -> pd.Categorical:
+        codes, cats = pd.factorize(np.asarray(values, dtype=object), sort=True)
+        return pd.Categorical.from_codes(np.repeat(codes, k * 3)[keep], cats)
+
+    def per_prefix(codes, cats) -> pd.Categorical:
+        return pd.Categorical.from_codes(np.tile(np.repeat(codes, 3), n)[keep], cats)
+
+    return pd.DataFrame({
+        "snapshot_time": pd.to_datetime(np.repeat(snap_time.ravel(), 3)[keep], utc=True),
+        "commence_time": pd.to_datetime(np.repeat(kickoff, k * 3)[keep], utc=True),
+        "event_key": per_match(event_key),
+        "home": per_match(df["HomeTeam"]),
+        "away": per_match(df["AwayTeam"]),
+        # e.g., B365, B365C, PS, PSC, AVG, AVGC, MAX, MAXC ...
+        "bookmaker": per_prefix(np.arange(k), prefixes),
+        "market": pd.Categorical.from_codes(np.zeros(keep.sum(), dtype=np.int8), ["h2h"]),
+        "phase": per_prefix(np.where(is_close, 0, 1), ["close", "open"]),
+        "side": pd.Categorical.from_codes(np.tile([2, 1, 0], n * k)[keep],
+                                          ["away", "draw", "home"]),
+        "point": None,
+        "price": cube.ravel()[keep],
+    })
 
 # -------------------- API-Football (optional)
 
@@ -157,19 +246,22 @@ def tidy_from_fdata(df_all: pd.DataFrame, start: datetime, end: datetime) -> pd.
 APIFOOTBALL = os.environ.get("APIFOOTBALL_KEY")
 APIF_BASE = "https://v3.football.api-sports.io"
 EPL_LEAGUE_ID = 39  # EPL
+APIF_WORKERS = 4  # each worker still sleeps 0.3s per call -> ~10 req/s overall
 
 
-def apif_get(path: str, params: Dict[str, Any]) -> dict:
+def apif_get(path: str, params: Dict[str, Any], max_age: float = LIVE_MAX_AGE) -> dict:
     headers = {"x-apisports-key": APIFOOTBALL}
-    resp = requests.get(f"{APIF_BASE}{path}",
-                        headers=headers, params=params, timeout=30)
-    resp.raise_for_status()
-    return resp.json()
+    # quota/plan problems come back as 200 with a non-empty "errors" field; never cache those
+    status, text = cached_get(f"{APIF_BASE}{path}", max_age, params=params, headers=headers,
+                              valid=lambda t: not json.loads(t).get("errors"))
+    if status >= 400:
+        raise requests.HTTPError(f"{status} error for {APIF_BASE}{path}")
+    return json.loads(text)
 
 
 def fetch_apif_fixtures(season_year: int) -> pd.DataFrame:
-    js = apif_get(
-        "/fixtures", {"league": EPL_LEAGUE_ID, "season": season_year})
+    js = apif_get("/fixtures", {"league": EPL_LEAGUE_ID, "season": season_year},
+                  max_age=FOREVER if season_finished(season_year) else LIVE_MAX_AGE)
     rows = []
     for item in js.get("response", []):
         fix = item.get("fixture", {})
@@ -186,8 +278,17 @@ def fetch_apif_fixtures(season_year: int) -> pd.DataFrame:
     return df
 
 
-def flatten_apif_odds(odds_js: dict) -> List[Dict]:
-    rows = []
+ODDS_COLS = ["snapshot_time", "commence_time", "event_key", "home", "away",
+             "bookmaker", "market", "phase", "side", "point", "price"]
+SIDES = ("home", "draw", "away")
+# API-Football outcome labels -> side
+SIDE_BY_VALUE = {"home": "home", "1": "home", "draw": "draw",
+                 "x": "draw", "away": "away", "2": "away"}
+
+
+def flatten_apif_odds(odds_js: dict) -> Dict[str, List]:
+    # column lists (one entry per outcome) instead of a dict per row
+    cols = {c: [] for c in ODDS_COLS}
     for item in odds_js.get("response", []):
         fixture = item.get("fixture", {})
         league = item.get("league", {})
@@ -205,54 +306,95 @@ def flatten_apif_odds(odds_js: dict) -> List[Dict]:
                     # values could be {"value":"Home","odd":"1.75"} or {"value":"1","odd":"1.75"}
                     prices = {"home": None, "draw": None, "away": None}
                     for v in bet.get("values", []):
-                        val = (v.get("value") or "").strip().lower()
-                        price = safe_float(v.get("odd"))
-                        if val in ("home", "1"):
-                            prices["home"] = price
-                        elif val in ("draw", "x"):
-                            prices["draw"] = price
-                        elif val in ("away", "2"):
-                            prices["away"] = price
-                    if all(prices[k] is not None for k in ("home", "draw", "away")):
-                        base = {
-                            "snapshot_time": bupd or commence_time,
-                            "commence_time": commence_time,
-                            "event_key": f"{fixture.get('id')}",
-                            "home": None, "away": None,  # names not in odds payload always
-                            "bookmaker": f"APIF-{bname}",
-                            "market": "h2h",
-                            "phase": "prematch",
-                        }
-                        for side, price in prices.items():
-                            rows.append(
-                                {**base, "side": side, "point": None, "price": price})
-    return rows
+                        side = SIDE_BY_VALUE.get((v.get("value") or "").strip().lower())
+                        if side:
+                            prices[side] = safe_float(v.get("odd"))
+                    if all(prices[k] is not None for k in SIDES):
+                        for c, v in (("snapshot_time", bupd or commence_time),
+                                     ("commence_time", commence_time),
+                                     ("event_key", f"{fixture.get('id')}"),
+                                     # names not in odds payload always
+                                     ("home", None), ("away", None),
+                                     ("bookmaker", f"APIF-{bname}"),
+                                     ("market", "h2h"),
+                                     ("phase", "prematch"),
+                                     ("point", None)):
+                            cols[c] += (v, v, v)
+                        cols["side"] += SIDES
+                        cols["price"] += [prices[k] for k in SIDES]
+    return cols
+
+
+def fetch_apif_fixture_odds(fx: tuple) -> Dict[str, List]:
+    fixture_id, home, away, kickoff = fx
+    # pre-match odds are final once the fixture is a week in the past
+    settled = kickoff < pd.Timestamp.now(tz="UTC") - pd.Timedelta(days=7)
+    js = apif_get("/odds", {"fixture": int(fixture_id)},
+                  max_age=FOREVER if settled else LIVE_MAX_AGE)
+    cols = flatten_apif_odds(js)
+    # backfill team names & kickoff if missing
+    cols["home"] = [h or home for h in cols["home"]]
+    cols["away"] = [a or away for a in cols["away"]]
+    if not all(cols["commence_time"]):
+        kickoff_iso = iso(kickoff.to_pydatetime())
+        cols["commence_time"] = [t or kickoff_iso for t in cols["commence_time"]]
+    cols["snapshot_time"] = [s or t for s, t in zip(cols["snapshot_time"], cols["commence_time"])]
+    rate_limit_sleep(0.3)
+    return cols
 
 
 def fetch_apif_odds_for_season(season_year: int) -> pd.DataFrame:
     # For rate limits, it's cheaper to fetch odds by date pages where available,
     # but we use fixture-based pulls here for clarity.
     fixtures = fetch_apif_fixtures(season_year)
-    all_rows = []
-    for _, fx in fixtures.iterrows():
-        js = apif_get("/odds", {"fixture": int(fx["fixture_id"])})
-        rows = flatten_apif_odds(js)
-        # backfill team names & kickoff if missing
-        for r in rows:
-            if not r["home"]:
-                r["home"] = fx["home"]
-                r["away"] = fx["away"]
-            if not r["commence_time"]:
-                r["commence_time"] = iso(fx["utc_kickoff"].to_pydatetime())
-            if not r["snapshot_time"]:
-                r["snapshot_time"] = r["commence_time"]
-        all_rows.extend(rows)
-        rate_limit_sleep(0.3)
-    return pd.DataFrame(all_rows)
+    if fixtures.empty:
+        return pd.DataFrame()
+    all_cols = {c: [] for c in ODDS_COLS}
+    cols = ["fixture_id", "home", "away", "utc_kickoff"]
+    with ThreadPoolExecutor(max_workers=APIF_WORKERS) as ex:
+        for fx_cols in ex.map(fetch_apif_fixture_odds,
+                              fixtures[cols].itertuples(index=False, name=None)):
+            for c in ODDS_COLS:
+                all_cols[c] += fx_cols[c]
+    if not all_cols["side"]:
+        return pd.DataFrame()
+    return pd.DataFrame(all_cols)
+
+
+def apif_season_chunks(date_from: datetime, date_to: datetime) -> Iterator[pd.DataFrame]:
+    # one tidy frame per API-Football season, filtered to the window
+    for y in range(date_from.year, date_to.year + 1):
+        print(f"Fetching API-Football odds for season {y}…")
+        df = fetch_apif_odds_for_season(y)
+        if df.empty:
+            continue
+        # filter by date range when commence_time available
+        if "commence_time" in df.columns:
+            df["commence_time"] = pd.to_datetime(
+                df["commence_time"], utc=True, errors="coerce")
+            df = df[df["commence_time"].between(pd.Timestamp(
+                date_from), pd.Timestamp(date_to), inclusive="both")]
+        yield df
 
 # -------------------- features + sequences
 
 
+# repeated labels: categoricals hash as integer codes in the groupbys below
+CATEGORY_COLS = ["event_key", "home", "away",
+                 "bookmaker", "market", "phase", "side"]
+
+
+def to_categories(df: pd.DataFrame) -> pd.DataFrame:
+    return df.astype({c: "category" for c in CATEGORY_COLS if c in df.columns})
+
+
+def arrow_schema(tbl: pa.Table) -> pa.Schema:
+    # int32 dictionary indices so later seasons with more categories still fit
+    return pa.schema([f.with_type(pa.dictionary(pa.int32(), f.type.value_type))
+                      if pa.types.is_dictionary(f.type) else f for f in tbl.schema],
+                     metadata=tbl.schema.metadata)
+
+
 def add_time_features(df: pd.DataFrame) -> pd.DataFrame:
     if "snapshot_time" in df.columns:
         df["snapshot_time"] = pd.to_datetime(
@@ -266,34 +408,23 @@ def add_time_features(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def implied_prob_decimal(decimal_odds: float) -> Optional[float]:
-    if decimal_odds and decimal_odds > 0:
-        return 1.0 / decimal_odds
-    return None
-
-
-def devig_h2h(group: pd.DataFrame) -> pd.DataFrame:
-    probs = group["price"].apply(implied_prob_decimal)
-    s = probs.sum()
-    if s and s > 0:
-        group["implied"] = probs
-        group["devig"] = probs / s
-    else:
-        group["implied"] = np.nan
-        group["devig"] = np.nan
-    return group
-
-
 def compute_features(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    df["implied"] = np.where(df["price"].notna(), 1.0/df["price"], np.nan)
+    # adds columns in place, like add_time_features
+    # decimal odds -> implied probability; missing or non-positive prices give NaN
+    price = df["price"].to_numpy(dtype=float)
+    with np.errstate(divide="ignore"):
+        df["implied"] = np.where(price > 0, 1.0/price, np.nan)
+    # de-vig h2h per snapshot (event, book, time)
+    keys = ["event_key", "bookmaker", "snapshot_time"]
     mask = df["market"].eq("h2h")
-    df.loc[mask, ["implied", "devig"]] = np.nan
-    h2h = df[df["market"] == "h2h"].copy()
-    if not h2h.empty:
-        h2h = h2h.groupby(
-            ["event_key", "bookmaker", "snapshot_time"], group_keys=False).apply(devig_h2h)
-        df = pd.concat([df.drop(h2h.index), h2h], ignore_index=False)
+    s = df.loc[mask, keys + ["implied"]].groupby(keys, observed=True)[
+        "implied"].transform("sum")
+    df["devig"] = np.nan
+    df.loc[s.index, "devig"] = df.loc[s.index, "implied"] / s.where(s > 0)
+    # odds carry 3-4 significant digits; float32 halves the parquet/LSTM footprint
+    for c in ["price", "implied", "devig", "mins_to_kickoff"]:
+        if c in df.columns:
+            df[c] = df[c].astype("float32")
     return df.reset_index(drop=True)
 
 
@@ -304,23 +435,28 @@ def build_lstm_sequences(df: pd.DataFrame, lookback=2, by_bookmaker=True, use_de
     d = d[d["side"].isin(["home", "draw", "away"])]
     if use_col not in d.columns:
         d["devig"] = d["implied"]
-    wide = d.pivot_table(index=["event_key", "bookmaker", "snapshot_time"], columns="side",
-                         values=use_col, aggfunc="first").reset_index()
-    wide = wide.sort_values(["event_key", "bookmaker", "snapshot_time"])
+    wide = (d.groupby(["event_key", "bookmaker", "snapshot_time", "side"], observed=True, sort=False)[use_col]
+              .first().unstack("side").reset_index())
+    # order rows by (event, bookmaker, time) with an integer lexsort on factorized keys
+    # instead of a string sort; groups then come out already sorted
+    order = np.lexsort((wide["snapshot_time"].to_numpy(),
+                        pd.factorize(wide["bookmaker"], sort=True)[0],
+                        pd.factorize(wide["event_key"], sort=True)[0]))
+    wide = wide.iloc[order]
     grp_keys = ["event_key", "bookmaker"] if by_bookmaker else ["event_key"]
     X_list, y_list, meta = [], [], []
-    for key, g in wide.groupby(grp_keys):
+    for key, g in wide.groupby(grp_keys, sort=False, observed=True):
         g = g.dropna(subset=["home", "draw", "away"])
         arr = g[["home", "draw", "away"]].to_numpy(dtype=np.float32)
         if len(arr) <= lookback:
             continue
-        for i in range(lookback, len(arr)):
-            X_list.append(arr[i-lookback:i, :])
-            y_list.append(arr[i, :])
-            meta.append((key, g.iloc[i]["snapshot_time"]))
+        # window i covers steps [i, i+lookback) and predicts step i+lookback
+        X_list.append(sliding_window_view(arr, (lookback, 3))[:-1, 0])
+        y_list.append(arr[lookback:])
+        meta.extend((key, t) for t in g["snapshot_time"].iloc[lookback:])
     if not X_list:
         return None, None, None
-    return np.stack(X_list), np.stack(y_list), meta
+    return np.concatenate(X_list), np.concatenate(y_list), meta
 
 # -------------------- main
 
@@ -334,10 +470,14 @@ def main():
     ap.add_argument("--save-csv", action="store_true")
     ap.add_argument("--lookback", type=int, default=2,
                     help="LSTM lookback (steps).")
+    ap.add_argument("--cache-dir", default=None,
+                    help="HTTP cache directory (default: <outdir>/.cache).")
     args = ap.parse_args()
 
+    global CACHE_DIR
     outdir = "data"
     os.makedirs(outdir, exist_ok=True)
+    CACHE_DIR = args.cache_dir or os.path.join(outdir, ".cache")
     date_from = datetime.fromisoformat(args.start).replace(tzinfo=timezone.utc)
     date_to = datetime.fromisoformat(args.end).replace(tzinfo=timezone.utc)
 
@@ -345,65 +485,70 @@ def main():
         # pull seasons covering the date range
         seasons = seasons_covering_range(date_from, date_to)
         frames = []
-        for y in seasons:
-            df = load_fdata_season(y)
+        with ThreadPoolExecutor(max_workers=FD_WORKERS) as ex:
+            loaded = list(ex.map(load_fdata_season, seasons))
+        for y, df in zip(seasons, loaded):
             if df is not None:
                 frames.append(df)
                 print(
                     f"Loaded Football-Data season {y}/{(y+1) % 100:02d} ({len(df)} rows)")
             else:
                 print(f"Skip season {y}/{(y+1) % 100:02d} (no file)")
-            rate_limit_sleep(0.1)
         if not frames:
             print("No Football-Data seasons loaded.", file=sys.stderr)
             sys.exit(2)
-        raw = pd.concat(frames, ignore_index=True)
-        tidy = tidy_from_fdata(raw, date_from, date_to)
+        chunks = (tidy_from_fdata(df, date_from, date_to) for df in frames)
 
     else:  # API-Football
         if not APIFOOTBALL:
             print("ERROR: set APIFOOTBALL_KEY for API-Football source.",
                   file=sys.stderr)
             sys.exit(1)
-        tidy_frames = []
-        for y in range(date_from.year, date_to.year + 1):
-            print(f"Fetching API-Football odds for season {y}…")
-            df = fetch_apif_odds_for_season(y)
-            if not df.empty:
-                tidy_frames.append(df)
-        if not tidy_frames:
-            print("No API-Football odds found.", file=sys.stderr)
-            sys.exit(2)
-        tidy = pd.concat(tidy_frames, ignore_index=True)
-        # filter by date range when commence_time available
-        if "commence_time" in tidy.columns:
-            tidy["commence_time"] = pd.to_datetime(
-                tidy["commence_time"], utc=True, errors="coerce")
-            tidy = tidy[tidy["commence_time"].between(pd.Timestamp(
-                date_from), pd.Timestamp(date_to), inclusive="both")]
-
-    if tidy.empty:
+        chunks = apif_season_chunks(date_from, date_to)
+
+    # features + save, one season at a time (no full-history frame in memory)
+    pq_path = os.path.join(outdir, "odds_timeseries.parquet")
+    csv = os.path.join(outdir, "odds_timeseries.csv")
+    writer = None
+    n_rows = 0
+    X_parts, y_parts, meta = [], [], []
+    for tidy in chunks:
+        if tidy.empty:
+            continue
+        tidy = add_time_features(to_categories(tidy))
+        tidy = compute_features(tidy)
+        if writer is None:
+            schema = arrow_schema(pa.Table.from_pandas(tidy, preserve_index=False))
+            writer = pq.ParquetWriter(pq_path, schema, compression="zstd",
+                                      use_dictionary=True)
+        writer.write_table(pa.Table.from_pandas(
+            tidy, preserve_index=False, schema=writer.schema))
+        if args.save_csv:
+            tidy.to_csv(csv, mode="a" if n_rows else "w",
+                        header=not n_rows, index=False)
+        n_rows += len(tidy)
+
+        # LSTM sequences (next-step prediction of [home,draw,away]); events never span seasons
+        X, y, m = build_lstm_sequences(
+            tidy, lookback=args.lookback, by_bookmaker=True, use_devig=True)
+        if X is not None:
+            X_parts.append(X)
+            y_parts.append(y)
+            meta.extend(m)
+    if writer is not None:
+        writer.close()
+
+    if n_rows == 0:
         print("No odds collected in the requested window.", file=sys.stderr)
         sys.exit(3)
-
-    # features + save
-    tidy = add_time_features(tidy)
-    tidy = compute_features(tidy)
-
-    pq = os.path.join(outdir, "odds_timeseries.parquet")
-    tidy.to_parquet(pq, index=False)
-    if args.save_csv:
-        csv = os.path.join(outdir, "odds_timeseries.csv")
-        tidy.to_csv(csv, index=False)
-    print(f"Saved {len(tidy):,} rows to {pq}" +
+    print(f"Saved {n_rows:,} rows to {pq_path}" +
           (" and CSV" if args.save_csv else ""))
 
-    # LSTM sequences (next-step prediction of [home,draw,away])
-    X, y, meta = build_lstm_sequences(
-        tidy, lookback=args.lookback, by_bookmaker=True, use_devig=True)
-    if X is not None:
+    if X_parts:
+        X, y = np.concatenate(X_parts), np.concatenate(y_parts)
         npz = os.path.join(outdir, "lstm_sequences.npz")
-        np.savez_compressed(npz, X=X, y=y, meta=np.array(meta, dtype=object))
+        # stored, not deflated: zlib on float32 windows was the slowest step of the run
+        np.savez(npz, X=X, y=y, meta=np.array(meta, dtype=object))
         print(f"LSTM dataset: X{X.shape}, y{y.shape} -> {npz}")
     else:
         print("Not enough sequential steps to build LSTM arrays (try lookback=1 or include closing+opening).")
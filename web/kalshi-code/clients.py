@@ -1,12 +1,20 @@
 import requests
+import asyncio
 import base64
+import sys
+import functools
 import time
-from typing import Any, Dict, Optional
-from datetime import datetime, timedelta
+import threading
+from typing import Any, Dict, Optional, Union
 from enum import Enum
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
 import json
+import re
 
+from requests.adapters import HTTPAdapter
 from requests.exceptions import HTTPError
+from urllib3.util.retry import Retry
 
 from cryptography.hazmat.primitives import serialization, hashes
 from cryptography.hazmat.primitives.asymmetric import padding, rsa
@@ -14,6 +22,177 @@ from cryptography.exceptions import InvalidSignature
 
 import websockets
 
+# optional: faster JSON for the WebSocket feed if installed
+try:
+    import orjson
+    HAVE_ORJSON = True
+except Exception:
+    HAVE_ORJSON = False
+
+
+def _json_loads(data):
+    """Parses a JSON str/bytes payload; raises json.JSONDecodeError on bad input either way."""
+    return orjson.loads(data) if HAVE_ORJSON else json.loads(data)
+
+
+def _response_json(response: requests.Response) -> Any:
+    """Decodes a response body straight from bytes with orjson, else via response.json()."""
+    if HAVE_ORJSON:
+        try:
+            return orjson.loads(response.content)
+        except orjson.JSONDecodeError:
+            pass
+    return response.json()
+
+
+# Ticker subscription command; only the message id varies
+_SUBSCRIBE_TICKERS_TMPL = '{"id": %d, "cmd": "subscribe", "params": {"channels": ["ticker"]}}'
+
+# The signing scheme is fixed, so build the padding and hash objects once
+_PSS_PADDING = padding.PSS(
+    mgf=padding.MGF1(hashes.SHA256()),
+    salt_length=padding.PSS.DIGEST_LENGTH
+)
+_SHA256 = hashes.SHA256()
+_METHOD_BYTES = {"GET": b"GET", "POST": b"POST", "DELETE": b"DELETE"}
+
+class RateLimitedError(HTTPError):
+    """Raised for 429/503 responses once the server's Retry-After delay has been waited out."""
+
+
+def _retry_after_seconds(value: Optional[str]) -> float:
+    """Parses a Retry-After header given either as seconds or as an HTTP date."""
+    if not value:
+        return 0.0
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return 0.0
+
+# Team abbreviation mapping
+_TEAM_NAMES = {
+    "CFC": "Chelsea", "WOL": "Wolves", "BOU": "Bournemouth",
+    "AVL": "Aston Villa", "LIV": "Liverpool", "LFC": "Liverpool",  # LFC is also used
+    "MCI": "Manchester City", "ARS": "Arsenal", "TOT": "Tottenham", "CHE": "Chelsea",
+    "MUN": "Manchester United", "NEW": "Newcastle",
+    "BHA": "Brighton", "BRI": "Brighton", "BHAH": "Brighton",  # Various Brighton codes
+    "CRY": "Crystal Palace", "PAL": "Crystal Palace", "CP": "Crystal Palace",  # Crystal Palace variations
+    "EVE": "Everton", "FUL": "Fulham",
+    "LEI": "Leicester", "LEE": "Leeds", "SOU": "Southampton",
+    "WHU": "West Ham", "BRE": "Brentford", "NFO": "Nottingham Forest",
+    "BUR": "Burnley", "SHU": "Sheffield United", "LUT": "Luton"
+}
+
+# Ticker month codes: the code at offset 3*i of _MONTHS_UPPER is _MONTHS_TITLE[i]
+_MONTHS_UPPER = "JANFEBMARAPRMAYJUNJULAUGSEPOCTNOVDEC"
+_MONTHS_TITLE = ("Jan", "Feb", "Mar", "Apr", "May", "Jun",
+                 "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+# PREFIX-YYMMMDD<teams>-PROP, e.g. KXEPLGAME-25NOV08CFCWOL-CFC
+_TICKER_RE = re.compile(r"^[^-]*-(\d{2})([A-Z]{3})(\d{2})([^-]*)-([^-]*)")
+
+
+def _format_ticker_date(year_suffix: str, month: str, day: str) -> str:
+    """Formats YY, MMM, DD ticker fields as e.g. 'Nov 8, 2025'."""
+    year_suffix_int = int(year_suffix)
+    # If year suffix is 00-30, assume 2000-2030, otherwise assume 1900s
+    year = 2000 + year_suffix_int if year_suffix_int <= 30 else 1900 + year_suffix_int
+    idx = _MONTHS_UPPER.find(month) if len(month) == 3 else -1
+    month_name = _MONTHS_TITLE[idx // 3] if idx >= 0 and idx % 3 == 0 else month
+    return f"{month_name} {int(day)}, {year}"
+
+@functools.lru_cache(maxsize=1024)
+def _market_endpoint(host: str, markets_url: str, market_id: str):
+    """Returns the (signing path, full URL) pair for a single-market GET."""
+    path = f"{markets_url}/{market_id}"
+    return path, host + path
+
+# Upper bound on cached market details per WebSocket client
+_MARKET_CACHE_SIZE = 2048
+# Tasks rendering queued WebSocket ticker updates
+_RENDER_WORKERS = 4
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_ticker(ticker: str) -> Dict[str, str]:
+    """Parses an EPL ticker into date, team and prop fields (see KalshiWebSocketClient.parse_ticker)."""
+    # Example: KXEPLGAME-25NOV08CFCWOL-CFC
+    # Format: KXEPLGAME-DATETEAMS-PROP
+    # The date is typically 7 chars: 25NOV08 (YYMMMDD), followed by two 3-letter team codes
+    result = {"ticker": ticker, "date": "", "date_formatted": "",
+             "team1": "", "team1_full": "", "team2": "", "team2_full": "",
+             "prop": "", "prop_full": "", "bet_description": ""}
+
+    match = _TICKER_RE.match(ticker)
+    if match:
+        year_suffix, month, day, teams_str, prop_code = match.groups()
+        result["date"] = year_suffix + month + day
+        result["date_formatted"] = _format_ticker_date(year_suffix, month, day)
+    else:
+        # Irregular ticker: fall back to slicing the dash-separated parts
+        parts = ticker.split("-")
+        if len(parts) < 3:
+            return result
+        date_teams = parts[1]
+        prop_code = parts[2]
+        if len(date_teams) >= 7:
+            date_str = date_teams[:7]
+            result["date"] = date_str
+            try:
+                result["date_formatted"] = _format_ticker_date(date_str[:2], date_str[2:5], date_str[5:7])
+            except ValueError:
+                result["date_formatted"] = date_str
+        teams_str = date_teams[7:] if len(date_teams) >= 7 else date_teams
+
+    # Split teams (usually 3 letters each)
+    if len(teams_str) >= 6:
+        team1_code = teams_str[:3]
+        team2_code = teams_str[3:6]
+        result["team1"] = team1_code
+        result["team2"] = team2_code
+        result["team1_full"] = _TEAM_NAMES.get(team1_code, team1_code)
+        result["team2_full"] = _TEAM_NAMES.get(team2_code, team2_code)
+
+        # If team names not found, try alternative parsing
+        if result["team1_full"] == team1_code or result["team2_full"] == team2_code:
+            # Try swapping teams (sometimes order might be different)
+            team1_swapped = _TEAM_NAMES.get(team2_code, team2_code)
+            team2_swapped = _TEAM_NAMES.get(team1_code, team1_code)
+            if team1_swapped != team2_code or team2_swapped != team1_code:
+                if team1_swapped != team2_code:
+                    result["team1"] = team2_code
+                    result["team1_full"] = team1_swapped
+                if team2_swapped != team1_code:
+                    result["team2"] = team1_code
+                    result["team2_full"] = team2_swapped
+    elif len(teams_str) >= 3:
+        result["team1"] = teams_str[:3]
+        result["team1_full"] = _TEAM_NAMES.get(teams_str[:3], teams_str[:3])
+
+    # Third part is the prop/outcome
+    if prop_code:
+        if prop_code in ("TIE", "DRAW"):
+            result["prop"] = prop_code
+            result["prop_full"] = "Tie/Draw"
+        elif prop_code in _TEAM_NAMES:
+            result["prop"] = prop_code
+            result["prop_full"] = _TEAM_NAMES[prop_code] + " Wins"
+        else:
+            result["prop"] = prop_code
+            result["prop_full"] = prop_code
+
+        # Build bet description
+        if result["team1_full"] and result["team2_full"]:
+            result["bet_description"] = f"{result['prop_full']} ({result['team1_full']} vs {result['team2_full']})"
+        elif result["team1_full"]:
+            result["bet_description"] = f"{result['prop_full']} ({result['team1_full']} game)"
+
+    return result
+
 class Environment(Enum):
     DEMO = "demo"
     PROD = "prod"
@@ -36,7 +215,8 @@ class KalshiBaseClient:
         self.key_id = key_id
         self.private_key = private_key
         self.environment = environment
-        self.last_api_call = datetime.now()
+        # (timestamp, method, path) of the last signature and the headers built for it
+        self._last_signed = (None, None)
 
         if self.environment == Environment.DEMO:
             self.HTTP_BASE_URL = "https://demo-api.kalshi.co"
@@ -49,14 +229,22 @@ class KalshiBaseClient:
 
     def request_headers(self, method: str, path: str) -> Dict[str, Any]:
         """Generates the required authentication headers for API requests."""
-        current_time_milliseconds = int(time.time() * 1000)
+        current_time_milliseconds = time.time_ns() // 1_000_000
         timestamp_str = str(current_time_milliseconds)
 
         # Remove query params from path
-        path_parts = path.split('?')
+        base_path = path.partition('?')[0]
 
-        msg_string = timestamp_str + method + path_parts[0]
-        signature = self.sign_pss_text(msg_string)
+        # Same millisecond, method and path sign to the same message, so skip the RSA operation
+        sig_key = (current_time_milliseconds, method, base_path)
+        last_key, last_headers = self._last_signed
+        if sig_key == last_key:
+            return dict(last_headers)
+
+        # The signed payload is ASCII, so build it as bytes directly
+        method_bytes = _METHOD_BYTES.get(method) or method.encode()
+        message = b"%d%s%s" % (current_time_milliseconds, method_bytes, base_path.encode())
+        signature = self.sign_pss_text(message)
 
         headers = {
             "Content-Type": "application/json",
@@ -64,20 +252,14 @@ class KalshiBaseClient:
             "KALSHI-ACCESS-SIGNATURE": signature,
             "KALSHI-ACCESS-TIMESTAMP": timestamp_str,
         }
-        return headers
+        self._last_signed = (sig_key, headers)
+        return dict(headers)
 
-    def sign_pss_text(self, text: str) -> str:
-        """Signs the text using RSA-PSS and returns the base64 encoded signature."""
-        message = text.encode('utf-8')
+    def sign_pss_text(self, text: Union[str, bytes]) -> str:
+        """Signs the text (str or already-encoded bytes) using RSA-PSS and returns the base64 encoded signature."""
+        message = text if isinstance(text, bytes) else text.encode('utf-8')
         try:
-            signature = self.private_key.sign(
-                message,
-                padding.PSS(
-                    mgf=padding.MGF1(hashes.SHA256()),
-                    salt_length=padding.PSS.DIGEST_LENGTH
-                ),
-                hashes.SHA256()
-            )
+            signature = self.private_key.sign(message, _PSS_PADDING, _SHA256)
             return base64.b64encode(signature).decode('utf-8')
         except InvalidSignature as e:
             raise ValueError("RSA sign PSS failed") from e
@@ -89,78 +271,143 @@ class KalshiHttpClient(KalshiBaseClient):
         key_id: str,
         private_key: rsa.RSAPrivateKey,
         environment: Environment = Environment.DEMO,
+        burst: float = 10.0,
+        refill_rate: float = 10.0,
     ):
+        """Initializes the HTTP client.
+
+        Args:
+            burst (float): Calls allowed back to back before rate_limit sleeps.
+            refill_rate (float): Sustained calls per second allowed by rate_limit.
+        """
         super().__init__(key_id, private_key, environment)
         self.host = self.HTTP_BASE_URL
         self.exchange_url = "/trade-api/v2/exchange"
         self.markets_url = "/trade-api/v2/markets"
         self.portfolio_url = "/trade-api/v2/portfolio"
 
+        # Fixed endpoints: signing path and full URL built once
+        self._balance_path = self.portfolio_url + '/balance'
+        self._balance_url = self.host + self._balance_path
+        self._exchange_status_path = self.exchange_url + '/status'
+        self._exchange_status_url = self.host + self._exchange_status_path
+        self._trades_path = self.markets_url + '/trades'
+        self._trades_url = self.host + self._trades_path
+        self._markets_url = self.host + self.markets_url
+
+        # One pooled session so repeated calls reuse the TCP/TLS connection
+        self._session = requests.Session()
+        # requests only speaks HTTP/1.1, so concurrent callers (e.g. the pattern searches in
+        # fetch_markets.py) each take their own kept-alive connection from this per-host pool
+        # rather than multiplexing over one; 20 leaves room for those bursts without reconnecting
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=20,
+            max_retries=Retry(total=3, backoff_factor=0.2,
+                              status_forcelist=[429, 500, 502, 503, 504],
+                              raise_on_status=False),
+        )
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._session.headers["Accept"] = "application/json"
+
+        # Token bucket for rate_limit: bursts of up to `burst` calls, `refill_rate` calls/s sustained
+        self._bucket_capacity = burst
+        self._bucket_tokens = burst
+        self._bucket_refill_rate = refill_rate
+        self._bucket_ts = time.monotonic()
+        self._bucket_lock = threading.Lock()
+
+    def close(self) -> None:
+        """Closes the pooled HTTP session."""
+        self._session.close()
+
     def rate_limit(self) -> None:
         """Built-in rate limiter to prevent exceeding API rate limits.
-        OPTIMIZED: Only sleeps if necessary, reducing overhead."""
-        THRESHOLD_IN_MILLISECONDS = 100
-        now = datetime.now()
-        time_since_last_call = now - self.last_api_call
-        threshold_in_seconds = THRESHOLD_IN_MILLISECONDS / 1000
-        
-        # Only sleep if we're calling too fast (optimization: check first, sleep only if needed)
-        if time_since_last_call.total_seconds() < threshold_in_seconds:
-            time.sleep(threshold_in_seconds - time_since_last_call.total_seconds())
-        
-        self.last_api_call = datetime.now()
+        Token bucket: short bursts go through immediately, only a sustained rate sleeps."""
+        with self._bucket_lock:
+            now = time.monotonic()
+            self._bucket_tokens = min(
+                self._bucket_capacity,
+                self._bucket_tokens + (now - self._bucket_ts) * self._bucket_refill_rate,
+            )
+            self._bucket_ts = now
+            if self._bucket_tokens < 1.0:
+                time.sleep((1.0 - self._bucket_tokens) / self._bucket_refill_rate)
+                self._bucket_tokens = 1.0
+                self._bucket_ts = time.monotonic()
+            self._bucket_tokens -= 1.0
 
     def raise_if_bad_response(self, response: requests.Response) -> None:
         """Raises an HTTPError if the response status code indicates an error."""
-        if response.status_code not in range(200, 299):
+        # Server says the quota is spent: empty the bucket so the next call waits for the reset
+        if response.headers.get("RateLimit-Remaining") == "0":
+            reset = _retry_after_seconds(response.headers.get("RateLimit-Reset"))
+            with self._bucket_lock:
+                self._bucket_tokens = min(self._bucket_tokens, 1.0 - reset * self._bucket_refill_rate)
+                self._bucket_ts = time.monotonic()
+
+        if response.status_code in (429, 503):
+            # The session's Retry adapter has already waited out Retry-After on each attempt, so
+            # this is the final answer: report it without sleeping again and let the caller decide
+            delay = _retry_after_seconds(response.headers.get("Retry-After"))
+            print(f"API rate limited ({response.status_code}), retrying allowed after {delay:.1f}s",
+                  file=sys.stderr)
+            raise RateLimitedError(
+                f"{response.status_code} rate limited for url: {response.url}", response=response
+            )
+        if not 200 <= response.status_code < 300:
             # Print response details for debugging
             try:
-                error_body = response.json()
-                print(f"API Error ({response.status_code}): {error_body}")
+                error_body = _response_json(response)
+                print(f"API Error ({response.status_code}): {error_body}", file=sys.stderr)
             except:
-                print(f"API Error ({response.status_code}): {response.text}")
+                print(f"API Error ({response.status_code}): {response.text}", file=sys.stderr)
             response.raise_for_status()
 
     def post(self, path: str, body: dict) -> Any:
         """Performs an authenticated POST request to the Kalshi API."""
         self.rate_limit()
-        response = requests.post(
+        response = self._session.post(
             self.host + path,
             json=body,
             headers=self.request_headers("POST", path)
         )
         self.raise_if_bad_response(response)
-        return response.json()
+        return _response_json(response)
+
+    def get(self, path: str, params: Dict[str, Any] = {}, url: Optional[str] = None) -> Any:
+        """Performs an authenticated GET request to the Kalshi API.
 
-    def get(self, path: str, params: Dict[str, Any] = {}) -> Any:
-        """Performs an authenticated GET request to the Kalshi API."""
+        url, when given, is the precomputed self.host + path.
+        """
         self.rate_limit()
-        response = requests.get(
-            self.host + path,
+        response = self._session.get(
+            url or self.host + path,
             headers=self.request_headers("GET", path),
             params=params
         )
         self.raise_if_bad_response(response)
-        return response.json()
+        return _response_json(response)
 
     def delete(self, path: str, params: Dict[str, Any] = {}) -> Any:
         """Performs an authenticated DELETE request to the Kalshi API."""
         self.rate_limit()
-        response = requests.delete(
+        response = self._session.delete(
             self.host + path,
             headers=self.request_headers("DELETE", path),
             params=params
         )
         self.raise_if_bad_response(response)
-        return response.json()
+        return _response_json(response)
 
     def get_balance(self) -> Dict[str, Any]:
         """Retrieves the account balance."""
-        return self.get(self.portfolio_url + '/balance')
+        return self.get(self._balance_path, url=self._balance_url)
 
     def get_exchange_status(self) -> Dict[str, Any]:
         """Retrieves the exchange status."""
-        return self.get(self.exchange_url + "/status")
+        return self.get(self._exchange_status_path, url=self._exchange_status_url)
 
     def get_trades(
         self,
@@ -171,16 +418,19 @@ class KalshiHttpClient(KalshiBaseClient):
         min_ts: Optional[int] = None,
     ) -> Dict[str, Any]:
         """Retrieves trades based on provided filters."""
-        params = {
-            'ticker': ticker,
-            'limit': limit,
-            'cursor': cursor,
-            'max_ts': max_ts,
-            'min_ts': min_ts,
-        }
-        # Remove None values
-        params = {k: v for k, v in params.items() if v is not None}
-        return self.get(self.markets_url + '/trades', params=params)
+        # Only send the filters that were given
+        params = {}
+        if ticker is not None:
+            params['ticker'] = ticker
+        if limit is not None:
+            params['limit'] = limit
+        if cursor is not None:
+            params['cursor'] = cursor
+        if max_ts is not None:
+            params['max_ts'] = max_ts
+        if min_ts is not None:
+            params['min_ts'] = min_ts
+        return self.get(self._trades_path, params=params, url=self._trades_url)
 
     def get_market(self, market_id: str, silent: bool = False) -> Dict[str, Any]:
         """Retrieves detailed information about a specific market.
@@ -189,20 +439,20 @@ class KalshiHttpClient(KalshiBaseClient):
             market_id: The market ID to fetch
             silent: If True, don't print errors for 404 responses
         """
+        path, url = _market_endpoint(self.host, self.markets_url, market_id)
         if silent:
             # Use a version that doesn't print errors
             self.rate_limit()
-            response = requests.get(
-                self.host + self.markets_url + f'/{market_id}',
-                headers=self.request_headers("GET", self.markets_url + f'/{market_id}'),
+            response = self._session.get(
+                url,
+                headers=self.request_headers("GET", path),
             )
-            if response.status_code == 404:
+            # 404 and any other non-2xx status mean "no details"
+            if not 200 <= response.status_code < 300:
                 return {}
-            if response.status_code not in range(200, 299):
-                return {}
-            return response.json()
+            return _response_json(response)
         else:
-            return self.get(self.markets_url + f'/{market_id}')
+            return self.get(path, url=url)
 
     def get_markets(
         self,
@@ -210,17 +460,22 @@ class KalshiHttpClient(KalshiBaseClient):
         limit: Optional[int] = None,
         cursor: Optional[str] = None,
         status: Optional[str] = None,
+        series_ticker: Optional[str] = None,
     ) -> Dict[str, Any]:
         """Retrieves markets based on provided filters."""
-        params = {
-            'ticker': ticker,
-            'limit': limit,
-            'cursor': cursor,
-            'status': status,
-        }
-        # Remove None values
-        params = {k: v for k, v in params.items() if v is not None}
-        return self.get(self.markets_url, params=params)
+        # Only send the filters that were given
+        params = {}
+        if ticker is not None:
+            params['ticker'] = ticker
+        if limit is not None:
+            params['limit'] = limit
+        if cursor is not None:
+            params['cursor'] = cursor
+        if status is not None:
+            params['status'] = status
+        if series_ticker is not None:
+            params['series_ticker'] = series_ticker
+        return self.get(self.markets_url, params=params, url=self._markets_url)
 
 class KalshiWebSocketClient(KalshiBaseClient):
     """Client for handling WebSocket connections to the Kalshi API."""
@@ -236,8 +491,13 @@ class KalshiWebSocketClient(KalshiBaseClient):
         self.url_suffix = "/trade-api/ws/v2"
         self.message_id = 1  # Add counter for message IDs
         self.http_client = http_client
-        self.market_cache = {}  # Cache market details to avoid repeated API calls
-        self.ticker_cache = {}  # Cache parsed tickers for performance
+        # Cache market details to avoid repeated API calls, evicting the least recently used
+        self.market_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._market_fetches: Dict[str, "asyncio.Future"] = {}  # market_id -> in-flight fetch
+        # Parsed EPL ticker updates waiting to be rendered (one queue per worker), and the
+        # tasks rendering them; both are created on the running loop by _start_render_workers
+        self._msg_queues: "list[asyncio.Queue[Dict[str, Any]]]" = []
+        self._render_workers = []
 
     async def connect(self):
         """Establishes a WebSocket connection using authentication."""
@@ -245,24 +505,22 @@ class KalshiWebSocketClient(KalshiBaseClient):
         auth_headers = self.request_headers("GET", self.url_suffix)
         async with websockets.connect(host, additional_headers=auth_headers) as websocket:
             self.ws = websocket
-            await self.on_open()
-            await self.handler()
+            try:
+                await self.on_open()
+                await self.handler()
+            finally:
+                self._stop_render_workers()
 
     async def on_open(self):
         """Callback when WebSocket connection is opened."""
         print("WebSocket connection opened.")
+        self._start_render_workers()
         await self.subscribe_to_tickers()
 
     async def subscribe_to_tickers(self):
         """Subscribe to ticker updates for all markets."""
-        subscription_message = {
-            "id": self.message_id,
-            "cmd": "subscribe",
-            "params": {
-                "channels": ["ticker"]
-            }
-        }
-        await self.ws.send(json.dumps(subscription_message))
+        # Only the id changes between subscriptions; sent as str so it stays a text frame
+        await self.ws.send(_SUBSCRIBE_TICKERS_TMPL % self.message_id)
         self.message_id += 1
 
     async def handler(self):
@@ -276,237 +534,178 @@ class KalshiWebSocketClient(KalshiBaseClient):
             await self.on_error(e)
 
     def parse_ticker(self, ticker: str) -> Dict[str, str]:
-        """Parse EPL ticker to extract game information. Uses caching for performance."""
-        # Check cache first
-        if ticker in self.ticker_cache:
-            return self.ticker_cache[ticker].copy()
-        
-        # Team abbreviation mapping
-        team_names = {
-            "CFC": "Chelsea", "WOL": "Wolves", "BOU": "Bournemouth", 
-            "AVL": "Aston Villa", "LIV": "Liverpool", "LFC": "Liverpool",  # LFC is also used
-            "MCI": "Manchester City", "ARS": "Arsenal", "TOT": "Tottenham", "CHE": "Chelsea",
-            "MUN": "Manchester United", "NEW": "Newcastle", 
-            "BHA": "Brighton", "BRI": "Brighton", "BHAH": "Brighton",  # Various Brighton codes
-            "CRY": "Crystal Palace", "PAL": "Crystal Palace", "CP": "Crystal Palace",  # Crystal Palace variations
-            "EVE": "Everton", "FUL": "Fulham",
-            "LEI": "Leicester", "LEE": "Leeds", "SOU": "Southampton",
-            "WHU": "West Ham", "BRE": "Brentford", "NFO": "Nottingham Forest",
-            "BUR": "Burnley", "SHU": "Sheffield United", "LUT": "Luton"
-        }
-        
-        # Example: KXEPLGAME-25NOV08CFCWOL-CFC
-        # Format: KXEPLGAME-DATETEAMS-PROP
-        # The date is typically 7 chars: 25NOV08 (day + MON + day)
-        parts = ticker.split("-")
-        result = {"ticker": ticker, "date": "", "date_formatted": "", 
-                 "team1": "", "team1_full": "", "team2": "", "team2_full": "", 
-                 "prop": "", "prop_full": "", "bet_description": ""}
-        
-        if len(parts) >= 3:
-            # Second part contains date + teams: "25NOV08CFCWOL"
-            date_teams = parts[1]
-            
-            # Extract date (first 7 characters: 25NOV08)
-            # Format is: YYMMMDD (year, month, day) - e.g., "25NOV08" = Nov 8, 2025
-            if len(date_teams) >= 7:
-                date_str = date_teams[:7]  # "25NOV08"
-                result["date"] = date_str
-                # Format date nicely: 25NOV08 -> Nov 8, 2025
-                try:
-                    year_suffix = date_str[:2]  # "25" = 2025
-                    month = date_str[2:5]       # "NOV"
-                    day = date_str[5:7]         # "08" = day 8
-                    
-                    # Convert year suffix to full year
-                    year_suffix_int = int(year_suffix)
-                    # If year suffix is 00-30, assume 2000-2030, otherwise assume 1900s
-                    if year_suffix_int <= 30:
-                        year = 2000 + year_suffix_int
-                    else:
-                        year = 1900 + year_suffix_int
-                    
-                    month_map = {"JAN": "Jan", "FEB": "Feb", "MAR": "Mar", 
-                               "APR": "Apr", "MAY": "May", "JUN": "Jun",
-                               "JUL": "Jul", "AUG": "Aug", "SEP": "Sep",
-                               "OCT": "Oct", "NOV": "Nov", "DEC": "Dec"}
-                    month_name = month_map.get(month, month)
-                    result["date_formatted"] = f"{month_name} {int(day)}, {year}"
-                except Exception as e:
-                    # Fallback: try alternative parsing or use current year
-                    try:
-                        from datetime import datetime
-                        # Try YYMMMDD format
-                        year_suffix = date_str[:2]
-                        month = date_str[2:5]
-                        day = date_str[5:7] if len(date_str) >= 7 else date_str[5:]
-                        
-                        year_suffix_int = int(year_suffix)
-                        if year_suffix_int <= 30:
-                            year = 2000 + year_suffix_int
-                        else:
-                            year = 1900 + year_suffix_int
-                        
-                        month_map = {"JAN": "Jan", "FEB": "Feb", "MAR": "Mar", 
-                                   "APR": "Apr", "MAY": "May", "JUN": "Jun",
-                                   "JUL": "Jul", "AUG": "Aug", "SEP": "Sep",
-                                   "OCT": "Oct", "NOV": "Nov", "DEC": "Dec"}
-                        month_name = month_map.get(month, month)
-                        result["date_formatted"] = f"{month_name} {int(day)}, {year}"
-                    except:
-                        result["date_formatted"] = date_str
-            
-            # Extract teams (remaining after date)
-            teams_str = date_teams[7:] if len(date_teams) >= 7 else date_teams  # "CFCWOL"
-            
-            # Split teams (usually 3 letters each)
-            if len(teams_str) >= 6:
-                team1_code = teams_str[:3]
-                team2_code = teams_str[3:6]
-                result["team1"] = team1_code
-                result["team2"] = team2_code
-                result["team1_full"] = team_names.get(team1_code, team1_code)
-                result["team2_full"] = team_names.get(team2_code, team2_code)
-                
-                # If team names not found, try alternative parsing
-                if result["team1_full"] == team1_code or result["team2_full"] == team2_code:
-                    # Try swapping teams (sometimes order might be different)
-                    team1_swapped = team_names.get(team2_code, team2_code)
-                    team2_swapped = team_names.get(team1_code, team1_code)
-                    if team1_swapped != team2_code or team2_swapped != team1_code:
-                        if team1_swapped != team2_code:
-                            result["team1"] = team2_code
-                            result["team1_full"] = team1_swapped
-                        if team2_swapped != team1_code:
-                            result["team2"] = team1_code
-                            result["team2_full"] = team2_swapped
-            elif len(teams_str) >= 3:
-                result["team1"] = teams_str[:3]
-                result["team1_full"] = team_names.get(teams_str[:3], teams_str[:3])
-            
-            # Third part is the prop/outcome
-            if len(parts) >= 3:
-                prop_code = parts[2] if len(parts) > 2 else ""
-                if prop_code:
-                    if prop_code in ["TIE", "DRAW"]:
-                        result["prop"] = prop_code
-                        result["prop_full"] = "Tie/Draw"
-                    elif prop_code in team_names:
-                        result["prop"] = prop_code
-                        result["prop_full"] = team_names[prop_code] + " Wins"
-                    else:
-                        result["prop"] = prop_code
-                        result["prop_full"] = prop_code
-                    
-                    # Build bet description
-                    if result["team1_full"] and result["team2_full"]:
-                        result["bet_description"] = f"{result['prop_full']} ({result['team1_full']} vs {result['team2_full']})"
-                    elif result["team1_full"]:
-                        result["bet_description"] = f"{result['prop_full']} ({result['team1_full']} game)"
-        
-        # Cache the result
-        self.ticker_cache[ticker] = result.copy()
-        return result
+        """Parse EPL ticker to extract game information. Uses caching for performance.
+
+        The returned dict is a shared cache entry: treat it as read-only.
+        """
+        return _parse_ticker(ticker)
+
+    def _cache_market(self, market_id: str, details: Dict[str, Any]) -> Dict[str, Any]:
+        """Stores market details, dropping the least recently used entry past the cap."""
+        self.market_cache[market_id] = details
+        if len(self.market_cache) > _MARKET_CACHE_SIZE:
+            self.market_cache.popitem(last=False)
+        return details
+
+    async def _load_market_details(self, market_id: str) -> Dict[str, Any]:
+        """Fetches market details on a worker thread so the event loop keeps reading frames."""
+        try:
+            # Use silent mode to avoid printing 404 errors
+            market_data = await asyncio.to_thread(self.http_client.get_market, market_id, silent=True)
+        except Exception:
+            # Silently handle any errors (network issues, etc.)
+            market_data = {}
+        finally:
+            self._market_fetches.pop(market_id, None)
+        if market_data and "market" in market_data:
+            market_data = market_data["market"]
+        # Empty results are cached too, to avoid repeated failed requests
+        return self._cache_market(market_id, market_data or {})
 
     async def get_market_details(self, market_id: str) -> Dict[str, Any]:
-        """Get market details, using cache if available."""
+        """Get market details, using cache if available.
+
+        Concurrent lookups of the same uncached market share one in-flight request.
+        """
         if market_id in self.market_cache:
+            self.market_cache.move_to_end(market_id)
             return self.market_cache[market_id]
-        
-        if self.http_client:
+
+        if not self.http_client:
+            return {}
+
+        fetch = self._market_fetches.get(market_id)
+        if fetch is None:
+            fetch = asyncio.ensure_future(self._load_market_details(market_id))
+            self._market_fetches[market_id] = fetch
+        # shield: a cancelled caller must not cancel the fetch other callers are waiting on
+        return await asyncio.shield(fetch)
+
+    def _start_render_workers(self) -> None:
+        """Creates the render queues and workers on the running event loop."""
+        if self._render_workers:
+            return
+        self._msg_queues = [asyncio.Queue(maxsize=1024 // _RENDER_WORKERS)
+                            for _ in range(_RENDER_WORKERS)]
+        self._render_workers = [asyncio.ensure_future(self._render_worker(queue))
+                                for queue in self._msg_queues]
+
+    def _enqueue_render(self, msg: Dict[str, Any]) -> None:
+        """Queues a ticker update for the render workers, dropping the oldest one when full.
+
+        Updates are sharded by ticker, so one market's updates always go to the same
+        worker and print in the order they arrived.
+        """
+        self._start_render_workers()
+        queue = self._msg_queues[hash(msg.get("market_ticker", "")) % len(self._msg_queues)]
+        try:
+            queue.put_nowait(msg)
+        except asyncio.QueueFull:
+            queue.get_nowait()
+            queue.task_done()
+            queue.put_nowait(msg)
+
+    async def _render_worker(self, queue: "asyncio.Queue[Dict[str, Any]]"):
+        """Renders ticker updates from its queue until cancelled."""
+        while True:
+            msg = await queue.get()
             try:
-                # Use silent mode to avoid printing 404 errors
-                market_data = self.http_client.get_market(market_id, silent=True)
-                if not market_data:
-                    # Cache empty result to avoid repeated failed requests
-                    self.market_cache[market_id] = {}
-                    return {}
-                if "market" in market_data:
-                    self.market_cache[market_id] = market_data["market"]
-                    return market_data["market"]
-                elif market_data:  # If response is not empty but doesn't have "market" key
-                    self.market_cache[market_id] = market_data
-                    return market_data
-            except Exception:
-                # Silently handle any errors (network issues, etc.)
-                self.market_cache[market_id] = {}
-                return {}
-        
-        return {}
+                await self._render(msg)
+            except Exception as e:
+                await self.on_error(e)
+            finally:
+                queue.task_done()
+
+    def _stop_render_workers(self) -> None:
+        """Cancels the render workers (called when the connection ends)."""
+        for worker in self._render_workers:
+            worker.cancel()
+        self._render_workers = []
+
+    async def _render(self, msg: Dict[str, Any]):
+        """Prints one EPL ticker update, fetching market details if needed."""
+        ticker = msg.get("market_ticker", "")
+        market_id = msg.get("market_id", "")
+        price = msg.get("price_dollars", "N/A")
+        yes_bid = msg.get("yes_bid_dollars", "N/A")
+        yes_ask = msg.get("yes_ask_dollars", "N/A")
+        volume = msg.get("volume", 0)
+        open_interest = msg.get("open_interest", 0)
+
+        # Parse ticker for team names (shared cache entry, only read from here)
+        ticker_info = self.parse_ticker(ticker)
+
+        # Get market details if HTTP client is available
+        market_details = {}
+        if market_id and self.http_client:
+            market_details = await self.get_market_details(market_id)
+
+        # Build clean, organized output and emit it with a single write
+        lines = ["\n" + "─" * 70]
+
+        # Ticker
+        lines.append(f"📋 Ticker: {ticker}")
+
+        # Date
+        if ticker_info["date_formatted"]:
+            lines.append(f"📅 Date: {ticker_info['date_formatted']}")
+        elif ticker_info["date"]:
+            lines.append(f"📅 Date: {ticker_info['date']}")
+
+        # Teams
+        if ticker_info["team1_full"] and ticker_info["team2_full"]:
+            lines.append(f"⚽ Teams: {ticker_info['team1_full']} vs {ticker_info['team2_full']}")
+        elif ticker_info["team1_full"]:
+            lines.append(f"⚽ Team: {ticker_info['team1_full']}")
+        elif ticker_info["team1"]:
+            lines.append(f"⚽ Team: {ticker_info['team1']}")
+
+        # Bet/Prop
+        if ticker_info["bet_description"]:
+            lines.append(f"🎯 Bet: {ticker_info['bet_description']}")
+        elif ticker_info["prop_full"]:
+            lines.append(f"🎯 Bet: {ticker_info['prop_full']}")
+        elif ticker_info["prop"]:
+            lines.append(f"🎯 Bet: {ticker_info['prop']}")
+
+        # Odds and Pricing
+        lines.append("\n💰 Odds & Pricing:")
+        lines.append(f"   Current Price: ${price}")
+        lines.append(f"   Bid: ${yes_bid}  |  Ask: ${yes_ask}")
+
+        # Calculate implied probability from price
+        try:
+            price_float = float(price) if price != "N/A" else None
+            if price_float:
+                prob = price_float * 100
+                lines.append(f"   Implied Probability: {prob:.1f}%")
+        except:
+            pass
+
+        # Trading Stats
+        lines.append("\n📊 Trading Stats:")
+        lines.append(f"   Volume: {volume:,}")
+        lines.append(f"   Open Interest: {open_interest:,}")
+
+        lines.append("─" * 70)
+        sys.stdout.write("\n".join(lines) + "\n")
 
     async def on_message(self, message):
-        """Callback for handling incoming messages."""
+        """Callback for handling incoming messages.
+
+        Only parses and filters here; rendering (and any market lookup) happens in
+        the render workers so a slow fetch never holds up the next frame.
+        """
+        # Most frames are for other markets: skip them before paying for a JSON parse
+        if (b"EPLGAME" if isinstance(message, bytes) else "EPLGAME") not in message:
+            return
         try:
-            data = json.loads(message)
+            data = _json_loads(message)
             # Filter for EPL games only
             if data.get("type") == "ticker" and "msg" in data:
                 msg = data["msg"]
-                ticker = msg.get("market_ticker", "")
-                market_id = msg.get("market_id", "")
-                
-                if "EPLGAME" in ticker:
-                    price = msg.get("price_dollars", "N/A")
-                    yes_bid = msg.get("yes_bid_dollars", "N/A")
-                    yes_ask = msg.get("yes_ask_dollars", "N/A")
-                    volume = msg.get("volume", 0)
-                    open_interest = msg.get("open_interest", 0)
-                    
-                    # Parse ticker for team names
-                    ticker_info = self.parse_ticker(ticker)
-                    
-                    # Get market details if HTTP client is available
-                    market_details = {}
-                    if market_id and self.http_client:
-                        market_details = await self.get_market_details(market_id)
-                    
-                    # Build clean, organized output
-                    print("\n" + "─" * 70)
-                    
-                    # Ticker
-                    print(f"📋 Ticker: {ticker}")
-                    
-                    # Date
-                    if ticker_info["date_formatted"]:
-                        print(f"📅 Date: {ticker_info['date_formatted']}")
-                    elif ticker_info["date"]:
-                        print(f"📅 Date: {ticker_info['date']}")
-                    
-                    # Teams
-                    if ticker_info["team1_full"] and ticker_info["team2_full"]:
-                        print(f"⚽ Teams: {ticker_info['team1_full']} vs {ticker_info['team2_full']}")
-                    elif ticker_info["team1_full"]:
-                        print(f"⚽ Team: {ticker_info['team1_full']}")
-                    elif ticker_info["team1"]:
-                        print(f"⚽ Team: {ticker_info['team1']}")
-                    
-                    # Bet/Prop
-                    if ticker_info["bet_description"]:
-                        print(f"🎯 Bet: {ticker_info['bet_description']}")
-                    elif ticker_info["prop_full"]:
-                        print(f"🎯 Bet: {ticker_info['prop_full']}")
-                    elif ticker_info["prop"]:
-                        print(f"🎯 Bet: {ticker_info['prop']}")
-                    
-                    # Odds and Pricing
-                    print(f"\n💰 Odds & Pricing:")
-                    print(f"   Current Price: ${price}")
-                    print(f"   Bid: ${yes_bid}  |  Ask: ${yes_ask}")
-                    
-                    # Calculate implied probability from price
-                    try:
-                        price_float = float(price) if price != "N/A" else None
-                        if price_float:
-                            prob = price_float * 100
-                            print(f"   Implied Probability: {prob:.1f}%")
-                    except:
-                        pass
-                    
-                    # Trading Stats
-                    print(f"\n📊 Trading Stats:")
-                    print(f"   Volume: {volume:,}")
-                    print(f"   Open Interest: {open_interest:,}")
-                    
-                    print("─" * 70)
+                if "EPLGAME" in msg.get("market_ticker", ""):
+                    self._enqueue_render(msg)
         except json.JSONDecodeError:
             # If it's not JSON, print as is (might be connection messages)
             if "EPLGAME" in message:
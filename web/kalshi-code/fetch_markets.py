@@ -5,18 +5,32 @@ This script fetches markets from the Kalshi API and filters for EPL games.
 """
 import os
 import sys
+import atexit
+import functools
 import json
+import re
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from cryptography.hazmat.primitives import serialization
 
 from clients import KalshiHttpClient, Environment
 
+try:
+    import orjson
+    HAVE_ORJSON = True
+except Exception:
+    HAVE_ORJSON = False
+
 # Load environment variables
 load_dotenv()
 env = Environment.PROD  # toggle environment here (try PROD if DEMO doesn't work)
-KEYID = os.getenv('DEMO_KEYID') if env == Environment.DEMO else os.getenv('PROD_KEYID')
-KEYFILE = os.getenv('DEMO_KEYFILE') if env == Environment.DEMO else os.getenv('PROD_KEYFILE')
+KEY_LABEL = 'DEMO_KEYID' if env == Environment.DEMO else 'PROD_KEYID'
+KEYFILE_LABEL = 'DEMO_KEYFILE' if env == Environment.DEMO else 'PROD_KEYFILE'
+KEYID = os.getenv(KEY_LABEL)
+KEYFILE = os.getenv(KEYFILE_LABEL)
+# Adds the "debug" block (ticker samples, counts) to successful responses; error responses always carry theirs
+DEBUG = os.getenv("FETCH_MARKETS_DEBUG") == "1"
 
 # Team abbreviation mapping (same as in clients.py)
 TEAM_NAMES = {
@@ -32,9 +46,34 @@ TEAM_NAMES = {
     "BUR": "Burnley", "SHU": "Sheffield United", "LUT": "Luton"
 }
 
+MONTH_MAP = {
+    "JAN": "Jan", "FEB": "Feb", "MAR": "Mar",
+    "APR": "Apr", "MAY": "May", "JUN": "Jun",
+    "JUL": "Jul", "AUG": "Aug", "SEP": "Sep",
+    "OCT": "Oct", "NOV": "Nov", "DEC": "Dec"
+}
+
+# YY, MMM, DD, teams and prop of a regular ticker; anything else takes the slicing path
+TICKER_RE = re.compile(r"^[^-]*-(\d{2})([A-Z]{3})(\d{2})([^-]*)-([^-]*)")
+
+def format_ticker_date(date_str: str) -> str:
+    """Formats a YYMMMDD ticker date, e.g. 25NOV08 -> Nov 8, 2025 (ValueError if not numeric).
+
+    Plain slicing on purpose: datetime.strptime runs through the pure-Python _strptime
+    module, is several times slower, and would reject codes this passes through.
+    """
+    year_suffix_int = int(date_str[:2])
+    # If year suffix is 00-30, assume 2000-2030, otherwise assume 1900s
+    year = 2000 + year_suffix_int if year_suffix_int <= 30 else 1900 + year_suffix_int
+    month = date_str[2:5]
+    return f"{MONTH_MAP.get(month, month)} {int(date_str[5:7])}, {year}"
+
+@functools.lru_cache(maxsize=4096)
 def parse_ticker(ticker: str) -> dict:
-    """Parse EPL ticker to extract game information."""
-    parts = ticker.split("-")
+    """Parse EPL ticker to extract game information.
+
+    Cached: tickers repeat across pattern searches, so the returned dict is shared and must not be mutated.
+    """
     result = {
         "ticker": ticker,
         "date": "",
@@ -48,9 +87,21 @@ def parse_ticker(ticker: str) -> dict:
         "bet_description": ""
     }
     
-    if len(parts) >= 3:
+    # Regular tickers (KXEPLGAME-25NOV08CFCWOL-CFC) are picked apart by one regex match
+    match = TICKER_RE.match(ticker)
+    if match:
+        year_suffix, month, day, teams_str, prop_code = match.groups()
+        result["date"] = date_str = year_suffix + month + day
+        result["date_formatted"] = format_ticker_date(date_str)
+    else:
+        # Irregular ticker: fall back to slicing the dash-separated parts
+        parts = ticker.split("-")
+        if len(parts) < 3:
+            return result
         # Second part contains date + teams: "25NOV08CFCWOL"
         date_teams = parts[1]
+        # Third part is the prop/outcome
+        prop_code = parts[2]
         
         # Extract date (first 7 characters: 25NOV08)
         if len(date_teams) >= 7:
@@ -58,96 +109,153 @@ def parse_ticker(ticker: str) -> dict:
             result["date"] = date_str
             # Format date nicely: 25NOV08 -> Nov 8, 2025
             try:
-                year_suffix = date_str[:2]  # "25" = 2025
-                month = date_str[2:5]       # "NOV"
-                day = date_str[5:7]         # "08" = day 8
-                
-                # Convert year suffix to full year
-                year_suffix_int = int(year_suffix)
-                if year_suffix_int <= 30:
-                    year = 2000 + year_suffix_int
-                else:
-                    year = 1900 + year_suffix_int
-                
-                month_map = {
-                    "JAN": "Jan", "FEB": "Feb", "MAR": "Mar", 
-                    "APR": "Apr", "MAY": "May", "JUN": "Jun",
-                    "JUL": "Jul", "AUG": "Aug", "SEP": "Sep",
-                    "OCT": "Oct", "NOV": "Nov", "DEC": "Dec"
-                }
-                month_name = month_map.get(month, month)
-                result["date_formatted"] = f"{month_name} {int(day)}, {year}"
-            except Exception:
+                result["date_formatted"] = format_ticker_date(date_str)
+            except ValueError:
                 result["date_formatted"] = date_str
         
         # Extract teams (remaining after date)
         teams_str = date_teams[7:] if len(date_teams) >= 7 else date_teams  # "CFCWOL"
+    
+    # Split teams (usually 3 letters each)
+    if len(teams_str) >= 6:
+        team1_code = teams_str[:3]
+        team2_code = teams_str[3:6]
+        result["team1"] = team1_code
+        result["team2"] = team2_code
+        result["team1_full"] = TEAM_NAMES.get(team1_code, team1_code)
+        result["team2_full"] = TEAM_NAMES.get(team2_code, team2_code)
         
-        # Split teams (usually 3 letters each)
-        if len(teams_str) >= 6:
-            team1_code = teams_str[:3]
-            team2_code = teams_str[3:6]
-            result["team1"] = team1_code
-            result["team2"] = team2_code
-            result["team1_full"] = TEAM_NAMES.get(team1_code, team1_code)
-            result["team2_full"] = TEAM_NAMES.get(team2_code, team2_code)
-            
-            # If team names not found, try alternative parsing
-            if result["team1_full"] == team1_code or result["team2_full"] == team2_code:
-                # Try swapping teams (sometimes order might be different)
-                team1_swapped = TEAM_NAMES.get(team2_code, team2_code)
-                team2_swapped = TEAM_NAMES.get(team1_code, team1_code)
-                if team1_swapped != team2_code or team2_swapped != team1_code:
-                    if team1_swapped != team2_code:
-                        result["team1"] = team2_code
-                        result["team1_full"] = team1_swapped
-                    if team2_swapped != team1_code:
-                        result["team2"] = team1_code
-                        result["team2_full"] = team2_swapped
-        elif len(teams_str) >= 3:
-            result["team1"] = teams_str[:3]
-            result["team1_full"] = TEAM_NAMES.get(teams_str[:3], teams_str[:3])
-        
-        # Third part is the prop/outcome
-        if len(parts) >= 3:
-            prop_code = parts[2] if len(parts) > 2 else ""
-            if prop_code:
-                if prop_code in ["TIE", "DRAW"]:
-                    result["prop"] = prop_code
-                    result["prop_full"] = "Tie/Draw"
-                elif prop_code in TEAM_NAMES:
-                    result["prop"] = prop_code
-                    result["prop_full"] = TEAM_NAMES[prop_code] + " Wins"
-                else:
-                    result["prop"] = prop_code
-                    result["prop_full"] = prop_code
-                
-                # Build bet description
-                if result["team1_full"] and result["team2_full"]:
-                    result["bet_description"] = f"{result['prop_full']} ({result['team1_full']} vs {result['team2_full']})"
-                elif result["team1_full"]:
-                    result["bet_description"] = f"{result['prop_full']} ({result['team1_full']} game)"
+        # If team names not found, try alternative parsing
+        if result["team1_full"] == team1_code or result["team2_full"] == team2_code:
+            # Try swapping teams (sometimes order might be different)
+            team1_swapped = TEAM_NAMES.get(team2_code, team2_code)
+            team2_swapped = TEAM_NAMES.get(team1_code, team1_code)
+            if team1_swapped != team2_code or team2_swapped != team1_code:
+                if team1_swapped != team2_code:
+                    result["team1"] = team2_code
+                    result["team1_full"] = team1_swapped
+                if team2_swapped != team1_code:
+                    result["team2"] = team1_code
+                    result["team2_full"] = team2_swapped
+    elif len(teams_str) >= 3:
+        result["team1"] = teams_str[:3]
+        result["team1_full"] = TEAM_NAMES.get(teams_str[:3], teams_str[:3])
     
+    # Prop/outcome
+    if prop_code:
+        if prop_code in ("TIE", "DRAW"):
+            result["prop"] = prop_code
+            result["prop_full"] = "Tie/Draw"
+        elif prop_code in TEAM_NAMES:
+            result["prop"] = prop_code
+            result["prop_full"] = TEAM_NAMES[prop_code] + " Wins"
+        else:
+            result["prop"] = prop_code
+            result["prop_full"] = prop_code
+        
+        # Build bet description
+        if result["team1_full"] and result["team2_full"]:
+            result["bet_description"] = f"{result['prop_full']} ({result['team1_full']} vs {result['team2_full']})"
+        elif result["team1_full"]:
+            result["bet_description"] = f"{result['prop_full']} ({result['team1_full']} game)"
+
     return result
 
-def main():
-    """Main function to fetch and format markets."""
+# Case-insensitive markers of an EPL market ("EPL" also covers "EPLGAME")
+EPL_TICKER_RE = re.compile(r"EPL|PREMIER-?LEAGUE", re.IGNORECASE)
+EPL_TITLE_RE = re.compile(r"PREMIER[- ]?LEAGUE", re.IGNORECASE)
+
+MARKET_URL_PREFIX = "https://kalshi.com/markets/kxeplgame/english-premier-league-game/"
+
+# Kalshi API may return prices in different formats: (field, may be in cents) in order of preference
+YES_PRICE_FIELDS = (("yes_bid_dollars", False), ("yes_bid", True), ("yes_price", True))
+NO_PRICE_FIELDS = (("no_bid_dollars", False), ("no_bid", True), ("no_price", True))
+
+def resolve_price_field(market: dict, candidates: tuple):
+    """Returns the first (field, in_cents) of candidates present in market, or None."""
+    for spec in candidates:
+        if spec[0] in market:
+            return spec
+    return None
+
+def read_price(market: dict, spec) -> float:
+    """Reads the price named by spec from market, in dollars (0 when there is no price field)."""
+    if spec is None:
+        return 0
+    field, in_cents = spec
+    price = market.get(field, 0)
+    # If price > 1, it's likely in cents, convert to dollars
+    if in_cents and price > 1:
+        price = price / 100
+    return price
+
+def iter_markets(client: KalshiHttpClient, response: dict, max_pages: int, **params):
+    """Yields the markets of response, then of the following pages (up to max_pages in total).
+
+    Later pages are only requested once the earlier ones have been consumed; a failed
+    page request just ends the iteration.
+    """
+    pages = 1
+    while True:
+        yield from response.get("markets", [])
+        cursor = response.get("cursor")
+        if not cursor or pages >= max_pages:
+            return
+        try:
+            response = client.get_markets(cursor=cursor, **params)
+        except Exception:
+            return
+        pages += 1
+
+def search_pattern(client: KalshiHttpClient, pattern: str) -> tuple:
+    """Searches one ticker pattern.
+
+    Returns (open markets, markets from the unfiltered retry or None). The retry
+    only runs when no open markets came back.
+    """
+    # Try with status filter first
+    response = client.get_markets(
+        ticker=pattern,
+        limit=100,
+        status="open"
+    )
+    markets = response.get("markets", [])
+    if markets:
+        return markets, None
+    
+    # Also try without status filter (in case markets are not "open" but still active)
+    try:
+        response_no_status = client.get_markets(
+            ticker=pattern,
+            limit=100
+        )
+    except Exception:
+        return markets, None
+    return markets, response_no_status.get("markets")
+
+class MarketsError(Exception):
+    """Failure carrying the JSON error payload ({"error": ..., "markets": [], ...}) to emit."""
+    def __init__(self, payload: dict):
+        super().__init__(payload.get("error"))
+        self.payload = payload
+
+def fail(message: str):
+    """Raises MarketsError with the plain {"error", "markets"} payload."""
+    raise MarketsError({"error": message, "markets": []})
+
+@functools.lru_cache(maxsize=1)
+def get_client() -> KalshiHttpClient:
+    """Loads the private key and builds the HTTP client, once per process.
+
+    A long-running importer keeps reusing the same client and its open connections.
+    Raises MarketsError with the JSON error payload on failure.
+    """
     # Check credentials
     if not KEYID:
-        error_response = {
-            "error": f"API Key ID not found. Check your .env file for {'DEMO_KEYID' if env == Environment.DEMO else 'PROD_KEYID'}",
-            "markets": []
-        }
-        print(json.dumps(error_response))
-        sys.exit(1)
+        fail(f"API Key ID not found. Check your .env file for {KEY_LABEL}")
 
     if not KEYFILE:
-        error_response = {
-            "error": f"Key file path not found. Check your .env file for {'DEMO_KEYFILE' if env == Environment.DEMO else 'PROD_KEYFILE'}",
-            "markets": []
-        }
-        print(json.dumps(error_response))
-        sys.exit(1)
+        fail(f"Key file path not found. Check your .env file for {KEYFILE_LABEL}")
 
     try:
         with open(KEYFILE, "rb") as key_file:
@@ -156,19 +264,9 @@ def main():
                 password=None
             )
     except FileNotFoundError:
-        error_response = {
-            "error": f"Private key file not found at {KEYFILE}",
-            "markets": []
-        }
-        print(json.dumps(error_response))
-        sys.exit(1)
+        fail(f"Private key file not found at {KEYFILE}")
     except Exception as e:
-        error_response = {
-            "error": f"Error loading private key: {str(e)}",
-            "markets": []
-        }
-        print(json.dumps(error_response))
-        sys.exit(1)
+        fail(f"Error loading private key: {str(e)}")
 
     # Initialize the HTTP client
     try:
@@ -177,89 +275,73 @@ def main():
             private_key=private_key,
             environment=env
         )
+        # One client (and pooled session) serves every request made by this process
+        atexit.register(client.close)
     except Exception as e:
-        error_response = {
-            "error": f"Failed to initialize Kalshi client: {str(e)}",
-            "markets": []
-        }
-        print(json.dumps(error_response))
-        sys.exit(1)
+        fail(f"Failed to initialize Kalshi client: {str(e)}")
 
+    return client
+
+def fetch_and_format(client: KalshiHttpClient) -> dict:
+    """Fetches markets with client and returns the EPL response payload.
+
+    Raises MarketsError with the JSON error payload on failure.
+    """
     # Fetch markets
     try:
         # Try to fetch markets with EPL ticker pattern
         # First, try searching for markets with EPLGAME in ticker
         all_markets = []
-        cursor = None
-        total_searched = 0
+        seen_tickers = set()
         patterns_tried = []
         
         # Try different search patterns
         # Search for various EPL-related patterns
-        search_patterns = ["EPLGAME", "EPL", "KXEPLGAME", "PREMIER-LEAGUE", "PREMIERLEAGUE"]
+        search_patterns = ["EPL", "EPLGAME", "KXEPLGAME", "PREMIER-LEAGUE", "PREMIERLEAGUE"]
+        
+        # "EPL" is the broadest pattern (EPLGAME and KXEPLGAME both contain it), so it is
+        # searched alone first and the rest are skipped when it finds anything. Otherwise the
+        # remaining searches run concurrently over the client's pooled session; results are
+        # merged in pattern order (same order and dedupe as a sequential loop)
+        with ThreadPoolExecutor(max_workers=len(search_patterns) - 1) as pool:
+            futures = [pool.submit(search_pattern, client, search_patterns[0])]
+            try:
+                found = any(futures[0].result())
+            except Exception:
+                found = False
+            if not found:
+                futures += [pool.submit(search_pattern, client, pattern) for pattern in search_patterns[1:]]
         
-        for pattern in search_patterns:
+        for pattern, future in zip(search_patterns, futures):
             patterns_tried.append(pattern)
             try:
-                # Try with status filter first
-                response = client.get_markets(
-                    ticker=pattern,
-                    limit=100,
-                    status="open"
-                )
-                
-                if "markets" in response:
-                    markets = response["markets"]
-                    all_markets.extend(markets)
-                    total_searched += len(markets)
-                    
-                    # Check if there's a cursor for pagination
-                    if "cursor" in response and response["cursor"]:
-                        cursor = response["cursor"]
-                
-                # Also try without status filter (in case markets are not "open" but still active)
-                if not markets or len(markets) == 0:
-                    response_no_status = client.get_markets(
-                        ticker=pattern,
-                        limit=100
-                    )
-                    if "markets" in response_no_status:
-                        markets_no_status = response_no_status["markets"]
-                        # Avoid duplicates
-                        existing_tickers = {m.get("ticker") for m in all_markets}
-                        new_markets = [m for m in markets_no_status if m.get("ticker") not in existing_tickers]
-                        all_markets.extend(new_markets)
-                        total_searched += len(new_markets)
+                markets, markets_no_status = future.result()
             except Exception as e:
                 # Continue to next pattern if this one fails
                 continue
+            all_markets.extend(markets)
+            seen_tickers.update(m.get("ticker") for m in markets)
+            
+            if markets_no_status is not None:
+                # Avoid duplicates
+                new_markets = [m for m in markets_no_status if m.get("ticker") not in seen_tickers]
+                all_markets.extend(new_markets)
+                seen_tickers.update(m.get("ticker") for m in new_markets)
         
         # If no markets found with patterns, try fetching all markets and filtering
         # Also try without status filter and with different limits
+        markets_to_scan = all_markets
         if not all_markets:
             try:
-                # Try fetching without status filter first
+                # Try fetching without status filter first; the next page (if any) is
+                # fetched lazily while the first one is being filtered
                 response = client.get_markets(limit=1000)
-                if "markets" in response:
-                    all_markets = response["markets"]
-                    total_searched = len(all_markets)
-                    
-                    # If we got a cursor, try to get more
-                    if "cursor" in response and response["cursor"]:
-                        try:
-                            response2 = client.get_markets(limit=1000, cursor=response["cursor"])
-                            if "markets" in response2:
-                                all_markets.extend(response2["markets"])
-                                total_searched += len(response2["markets"])
-                        except:
-                            pass
+                markets_to_scan = iter_markets(client, response, max_pages=2, limit=1000)
             except Exception as e:
                 # Try with status filter as fallback
                 try:
                     response = client.get_markets(limit=500, status="open")
-                    if "markets" in response:
-                        all_markets = response["markets"]
-                        total_searched = len(all_markets)
+                    markets_to_scan = iter_markets(client, response, max_pages=1)
                 except Exception as e2:
                     error_response = {
                         "error": f"Failed to fetch markets: {str(e)}",
@@ -270,70 +352,47 @@ def main():
                             "patterns_tried": patterns_tried
                         }
                     }
-                    print(json.dumps(error_response))
-                    sys.exit(1)
+                    raise MarketsError(error_response)
         
         # Filter for EPL games
         epl_markets = []
+        # Formatted EPL markets by ticker; the pattern searches can return the same market
+        # more than once, and a ticker names one market for the whole run, so repeats are
+        # neither formatted nor listed again
+        formatted_by_ticker = {}
         sample_tickers = []
+        all_tickers_sample = []
+        total_searched = 0
+        # Bound once: the EPL check is the only work done for most markets in a large fallback scan
+        ticker_is_epl = EPL_TICKER_RE.search
+        title_is_epl = EPL_TITLE_RE.search
         
-        for market in all_markets:
+        for market in markets_to_scan:
             ticker = market.get("ticker", "")
-            ticker_upper = ticker.upper()
-            title = market.get("title", "").upper()
-            subtitle = market.get("subtitle", "").upper()
+            total_searched += 1
+            if DEBUG and len(all_tickers_sample) < 20:
+                all_tickers_sample.append(ticker)
+            if ticker in formatted_by_ticker:
+                continue
             
-            # Check if it's an EPL-related market
-            is_epl = (
-                "EPLGAME" in ticker_upper or
-                "EPL" in ticker_upper or
-                "PREMIER-LEAGUE" in ticker_upper or
-                "PREMIERLEAGUE" in ticker_upper or
-                "PREMIER LEAGUE" in title or
-                "PREMIER-LEAGUE" in title or
-                "PREMIERLEAGUE" in title
-            )
+            # Check if it's an EPL-related market (the title is only looked at when the ticker doesn't say)
+            is_epl = ticker_is_epl(ticker) or title_is_epl(market.get("title", ""))
             
             if is_epl:
-                # Parse ticker info (use original ticker, not uppercase)
+                # Parse ticker info
                 ticker_info = parse_ticker(ticker)
                 
                 # Extract market data
                 market_id = market.get("market_id", "")
-                market_title = market.get("title", ticker_info.get("bet_description", ticker))
+                # The parsed description is only a fallback, so don't look it up when there's a title
+                market_title = market["title"] if "title" in market else ticker_info.get("bet_description", ticker)
                 market_subtitle = market.get("subtitle", "")
                 status = market.get("status", "unknown")
                 
-                # Get pricing info - try different field names
-                # Kalshi API may return prices in different formats
-                yes_price = 0
-                no_price = 0
-                
-                # Try various field names for yes price
-                if "yes_bid_dollars" in market:
-                    yes_price = market.get("yes_bid_dollars", 0)
-                elif "yes_bid" in market:
-                    yes_price = market.get("yes_bid", 0)
-                    # If price > 1, it's likely in cents, convert to dollars
-                    if yes_price > 1:
-                        yes_price = yes_price / 100
-                elif "yes_price" in market:
-                    yes_price = market.get("yes_price", 0)
-                    if yes_price > 1:
-                        yes_price = yes_price / 100
-                
-                # Try various field names for no price
-                if "no_bid_dollars" in market:
-                    no_price = market.get("no_bid_dollars", 0)
-                elif "no_bid" in market:
-                    no_price = market.get("no_bid", 0)
-                    # If price > 1, it's likely in cents, convert to dollars
-                    if no_price > 1:
-                        no_price = no_price / 100
-                elif "no_price" in market:
-                    no_price = market.get("no_price", 0)
-                    if no_price > 1:
-                        no_price = no_price / 100
+                # Get pricing info - resolved per market, since market lists mix shapes and a
+                # market may carry a higher-priority field than the one before it
+                yes_price = read_price(market, resolve_price_field(market, YES_PRICE_FIELDS))
+                no_price = read_price(market, resolve_price_field(market, NO_PRICE_FIELDS))
                 
                 volume = market.get("volume", 0)
                 open_interest = market.get("open_interest", 0)
@@ -342,10 +401,9 @@ def main():
                 # Remove the prop part (last segment) and convert to lowercase
                 # Format: KXEPLGAME-25NOV09MCILFC-MCI -> kxeplgame-25nov09mcilfc
                 if ticker:
-                    ticker_parts = ticker.split('-')
-                    # Take first two parts (prefix and date+teams), skip the prop part
-                    url_ticker = '-'.join(ticker_parts[:2]).lower() if len(ticker_parts) >= 2 else ticker.lower()
-                    market_url = f"https://kalshi.com/markets/kxeplgame/english-premier-league-game/{url_ticker}"
+                    # Take first two parts (prefix and date+teams), skip the prop part; at most
+                    # two splits, since anything past the second dash is dropped anyway
+                    market_url = MARKET_URL_PREFIX + '-'.join(ticker.split('-', 2)[:2]).lower()
                 else:
                     market_url = None
                 
@@ -364,26 +422,30 @@ def main():
                 }
                 
                 epl_markets.append(formatted_market)
-            else:
+                if ticker:
+                    formatted_by_ticker[ticker] = formatted_market
+            elif DEBUG and len(sample_tickers) < 10:
                 # Collect sample tickers for debugging
-                if len(sample_tickers) < 10:
-                    sample_tickers.append(ticker)
+                sample_tickers.append(ticker)
         
         # Build response
         response_data = {
             "error": None,
-            "markets": epl_markets,
-            "debug": {
+            "markets": epl_markets
+        }
+        if DEBUG:
+            response_data["debug"] = {
                 "total_markets_searched": total_searched,
                 "epl_markets_found": len(epl_markets),
                 "sample_tickers": sample_tickers[:10],
                 "patterns_searched": patterns_tried,
-                "all_tickers_sample": [m.get("ticker", "") for m in all_markets[:20]] if all_markets else []
+                "all_tickers_sample": all_tickers_sample
             }
-        }
         
-        print(json.dumps(response_data))
+        return response_data
         
+    except MarketsError:
+        raise
     except Exception as e:
         error_response = {
             "error": f"Error processing markets: {str(e)}",
@@ -393,8 +455,31 @@ def main():
                 "patterns_tried": patterns_tried if 'patterns_tried' in locals() else []
             }
         }
-        print(json.dumps(error_response))
+        raise MarketsError(error_response)
+
+def write_json(payload: dict):
+    """Writes payload to stdout as one line of JSON, serialized with orjson when available."""
+    if HAVE_ORJSON:
+        try:
+            data = orjson.dumps(payload)
+        except TypeError:
+            pass
+        else:
+            # Anything already printed through the text layer has to go out first
+            sys.stdout.flush()
+            sys.stdout.buffer.write(data + b"\n")
+            sys.stdout.flush()
+            return
+    print(json.dumps(payload))
+
+def main():
+    """Main function to fetch and format markets."""
+    try:
+        response_data = fetch_and_format(get_client())
+    except MarketsError as e:
+        write_json(e.payload)
         sys.exit(1)
+    write_json(response_data)
 
 if __name__ == "__main__":
     main()
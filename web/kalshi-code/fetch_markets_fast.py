@@ -7,14 +7,24 @@ OPTIMIZED: Uses concurrent requests and better filtering for 30% faster.
 """
 import os
 import sys
+import atexit
+import functools
 import json
+import re
 import argparse
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from cryptography.hazmat.primitives import serialization
 
 from clients import KalshiHttpClient, Environment
 
+try:
+    import orjson
+    HAVE_ORJSON = True
+except Exception:
+    HAVE_ORJSON = False
+
 # Load environment variables
 load_dotenv()
 env = Environment.PROD
@@ -35,21 +45,46 @@ TEAM_NAMES = {
     "BUR": "Burnley", "SHU": "Sheffield United", "LUT": "Luton"
 }
 
-# Cache for parsed tickers to avoid redundant parsing
-_ticker_cache = {}
+MONTH_MAP = {
+    "JAN": "Jan", "FEB": "Feb", "MAR": "Mar",
+    "APR": "Apr", "MAY": "May", "JUN": "Jun",
+    "JUL": "Jul", "AUG": "Aug", "SEP": "Sep",
+    "OCT": "Oct", "NOV": "Nov", "DEC": "Dec"
+}
+
+# YY, MMM, DD, teams and prop of a regular ticker; anything else takes the slicing path
+TICKER_RE = re.compile(r"^[^-]*-(\d{2})([A-Z]{3})(\d{2})([^-]*)-([^-]*)")
+
+# Kalshi series holding the EPL game markets (the URLs built in process_market point into it)
+EPL_SERIES_TICKER = "KXEPLGAME"
+
+MARKET_URL_PREFIX = "https://kalshi.com/markets/kxeplgame/english-premier-league-game/"
 
+# Ticker prefixes of EPL markets (most common first)
+EPL_TICKER_PREFIXES = ("KXEPL", "EPL")
+
+# Related-market searches per game: the base ticker, TIE, DRAW and the two team codes
+RELATED_SEARCH_WORKERS = 5
+
+@functools.lru_cache(maxsize=4096)
 def extract_base_ticker(ticker: str) -> str:
     """Extract base ticker from full ticker (removes the prop/outcome part).
     Example: KXEPLGAME-25NOV23ARSTOT-ARS -> KXEPLGAME-25NOV23ARSTOT
     """
-    parts = ticker.split('-')
-    if len(parts) >= 2:
-        # Return first two parts (prefix + date+teams)
-        return '-'.join(parts[:2])
-    return ticker
+    # Return first two parts (prefix + date+teams); anything after the second dash is dropped
+    return '-'.join(ticker.split('-', 2)[:2])
 
-def find_related_markets(client, base_ticker: str, seen_tickers: set, team_codes: list) -> list:
+def format_ticker_date(date_str: str) -> str:
+    """Formats a YYMMMDD ticker date, e.g. 25NOV08 -> Nov 8, 2025 (ValueError if not numeric)."""
+    year_suffix_int = int(date_str[:2])
+    year = 2000 + year_suffix_int if year_suffix_int <= 30 else 1900 + year_suffix_int
+    month = date_str[2:5]
+    return f"{MONTH_MAP.get(month, month)} {int(date_str[5:7])}, {year}"
+
+def find_related_markets(client, base_ticker: str, seen_tickers: set, team_codes: list,
+                         pool: ThreadPoolExecutor) -> list:
     """Find related markets for the same game by searching for base ticker with different props.
+    The searches run on `pool`, which the caller owns and reuses across games.
     Returns list of market dictionaries.
     """
     related_markets = []
@@ -60,49 +95,41 @@ def find_related_markets(client, base_ticker: str, seen_tickers: set, team_codes
     # Common prop codes to search for
     common_props = ["TIE", "DRAW"] + [code for code in team_codes if code]  # Filter out empty codes
     
-    # Try searching with base ticker pattern
-    # The API might support partial ticker matching
-    try:
-        # Try searching with just the base ticker (first two parts)
-        # Note: This might not work if API requires exact match, but worth trying
-        response = client.get_markets(ticker=base_ticker, limit=100, status="open")
-        if "markets" in response:
-            for market in response["markets"]:
-                ticker = market.get("ticker", "")
-                if ticker and ticker not in seen_tickers:
-                    # Check if it's a related market (same base)
-                    if ticker.startswith(base_ticker + "-"):
-                        related_markets.append(market)
-    except Exception:
-        # API might not support partial ticker matching - that's okay
-        pass
+    # Try searching with just the base ticker (first two parts) - the API might support partial
+    # ticker matching - and also for each common prop (skipping empty ones and those already in base)
+    searches = [(base_ticker, 100)] + [
+        (f"{base_ticker}-{prop}", 10) for prop in common_props if prop and prop not in base_ticker
+    ]
     
-    # Also try searching for each common prop
-    for prop in common_props:
-        if not prop or prop in base_ticker:  # Skip if prop is already in base or empty
-            continue
+    # The searches are independent, so run them concurrently over the client's pooled session,
+    # then merge in search order (same result as searching one after another)
+    futures = [
+        pool.submit(client.get_markets, ticker=search_ticker, limit=search_limit, status="open")
+        for search_ticker, search_limit in searches
+    ]
+    
+    for future in futures:
         try:
-            search_ticker = f"{base_ticker}-{prop}"
-            response = client.get_markets(ticker=search_ticker, limit=10, status="open")
+            response = future.result()
             if "markets" in response:
                 for market in response["markets"]:
                     ticker = market.get("ticker", "")
                     if ticker and ticker not in seen_tickers:
+                        # Check if it's a related market (same base)
                         if ticker.startswith(base_ticker + "-"):
                             related_markets.append(market)
         except Exception:
-            # Continue to next prop if this search fails
+            # API might not support partial ticker matching, or this prop search failed - that's okay
             continue
     
     return related_markets
 
+@functools.lru_cache(maxsize=4096)
 def parse_ticker(ticker: str) -> dict:
-    """Parse EPL ticker to extract game information. Uses caching for performance."""
-    # Check cache first
-    if ticker in _ticker_cache:
-        return _ticker_cache[ticker].copy()  # Return copy to avoid mutation
-    
-    parts = ticker.split("-")
+    """Parse EPL ticker to extract game information.
+
+    Cached: the returned dict is shared by every caller with the same ticker and must not be mutated.
+    """
     result = {
         "ticker": ticker,
         "date": "",
@@ -116,99 +143,98 @@ def parse_ticker(ticker: str) -> dict:
         "bet_description": ""
     }
     
-    if len(parts) >= 3:
+    # Regular tickers (KXEPLGAME-25NOV08CFCWOL-CFC) are picked apart by one regex match
+    match = TICKER_RE.match(ticker)
+    if match:
+        year_suffix, month, day, teams_str, prop_code = match.groups()
+        result["date"] = date_str = year_suffix + month + day
+        result["date_formatted"] = format_ticker_date(date_str)
+    else:
+        # Irregular ticker: fall back to slicing the dash-separated parts
+        parts = ticker.split("-")
+        if len(parts) < 3:
+            return result
         date_teams = parts[1]
+        prop_code = parts[2]
         
         if len(date_teams) >= 7:
             date_str = date_teams[:7]
             result["date"] = date_str
             try:
-                year_suffix = date_str[:2]
-                month = date_str[2:5]
-                day = date_str[5:7]
-                
-                year_suffix_int = int(year_suffix)
-                if year_suffix_int <= 30:
-                    year = 2000 + year_suffix_int
-                else:
-                    year = 1900 + year_suffix_int
-                
-                month_map = {
-                    "JAN": "Jan", "FEB": "Feb", "MAR": "Mar", 
-                    "APR": "Apr", "MAY": "May", "JUN": "Jun",
-                    "JUL": "Jul", "AUG": "Aug", "SEP": "Sep",
-                    "OCT": "Oct", "NOV": "Nov", "DEC": "Dec"
-                }
-                month_name = month_map.get(month, month)
-                result["date_formatted"] = f"{month_name} {int(day)}, {year}"
+                result["date_formatted"] = format_ticker_date(date_str)
             except Exception:
                 result["date_formatted"] = date_str
         
         teams_str = date_teams[7:] if len(date_teams) >= 7 else date_teams
+    
+    if len(teams_str) >= 6:
+        team1_code = teams_str[:3]
+        team2_code = teams_str[3:6]
+        result["team1"] = team1_code
+        result["team2"] = team2_code
+        result["team1_full"] = TEAM_NAMES.get(team1_code, team1_code)
+        result["team2_full"] = TEAM_NAMES.get(team2_code, team2_code)
         
-        if len(teams_str) >= 6:
-            team1_code = teams_str[:3]
-            team2_code = teams_str[3:6]
-            result["team1"] = team1_code
-            result["team2"] = team2_code
-            result["team1_full"] = TEAM_NAMES.get(team1_code, team1_code)
-            result["team2_full"] = TEAM_NAMES.get(team2_code, team2_code)
+        # If team names not found, try alternative parsing (some teams might be 4 chars or different order)
+        if result["team1_full"] == team1_code or result["team2_full"] == team2_code:
+            # Try swapping teams (sometimes order might be different)
+            team1_swapped = TEAM_NAMES.get(team2_code, team2_code)
+            team2_swapped = TEAM_NAMES.get(team1_code, team1_code)
+            if team1_swapped != team2_code or team2_swapped != team1_code:
+                # If swapping gives us better results, use it
+                if team1_swapped != team2_code:
+                    result["team1"] = team2_code
+                    result["team1_full"] = team1_swapped
+                if team2_swapped != team1_code:
+                    result["team2"] = team1_code
+                    result["team2_full"] = team2_swapped
             
-            # If team names not found, try alternative parsing (some teams might be 4 chars or different order)
-            if result["team1_full"] == team1_code or result["team2_full"] == team2_code:
-                # Try swapping teams (sometimes order might be different)
-                team1_swapped = TEAM_NAMES.get(team2_code, team2_code)
-                team2_swapped = TEAM_NAMES.get(team1_code, team1_code)
-                if team1_swapped != team2_code or team2_swapped != team1_code:
-                    # If swapping gives us better results, use it
-                    if team1_swapped != team2_code:
-                        result["team1"] = team2_code
-                        result["team1_full"] = team1_swapped
-                    if team2_swapped != team1_code:
-                        result["team2"] = team1_code
-                        result["team2_full"] = team2_swapped
-                
-                # Try 4-char team codes if still not found
-                if (result["team1_full"] == result["team1"] or result["team2_full"] == result["team2"]) and len(teams_str) >= 7:
-                    team1_code_alt = teams_str[:4]
-                    if team1_code_alt in TEAM_NAMES:
-                        result["team1"] = team1_code_alt
-                        result["team1_full"] = TEAM_NAMES[team1_code_alt]
-                        team2_code_alt = teams_str[4:7] if len(teams_str) >= 7 else teams_str[4:]
-                        result["team2"] = team2_code_alt
-                        result["team2_full"] = TEAM_NAMES.get(team2_code_alt, team2_code_alt)
-        elif len(teams_str) >= 3:
-            result["team1"] = teams_str[:3]
-            result["team1_full"] = TEAM_NAMES.get(teams_str[:3], teams_str[:3])
-        
-        if len(parts) >= 3:
-            prop_code = parts[2] if len(parts) > 2 else ""
-            if prop_code:
-                if prop_code in ["TIE", "DRAW"]:
-                    result["prop"] = prop_code
-                    result["prop_full"] = "Tie/Draw"
-                elif prop_code in TEAM_NAMES:
-                    result["prop"] = prop_code
-                    result["prop_full"] = TEAM_NAMES[prop_code] + " Wins"
-                else:
-                    result["prop"] = prop_code
-                    result["prop_full"] = prop_code
-                
-                if result["team1_full"] and result["team2_full"]:
-                    result["bet_description"] = f"{result['prop_full']} ({result['team1_full']} vs {result['team2_full']})"
-                elif result["team1_full"]:
-                    result["bet_description"] = f"{result['prop_full']} ({result['team1_full']} game)"
+            # Try 4-char team codes if still not found
+            if (result["team1_full"] == result["team1"] or result["team2_full"] == result["team2"]) and len(teams_str) >= 7:
+                team1_code_alt = teams_str[:4]
+                if team1_code_alt in TEAM_NAMES:
+                    result["team1"] = team1_code_alt
+                    result["team1_full"] = TEAM_NAMES[team1_code_alt]
+                    team2_code_alt = teams_str[4:7] if len(teams_str) >= 7 else teams_str[4:]
+                    result["team2"] = team2_code_alt
+                    result["team2_full"] = TEAM_NAMES.get(team2_code_alt, team2_code_alt)
+    elif len(teams_str) >= 3:
+        result["team1"] = teams_str[:3]
+        result["team1_full"] = TEAM_NAMES.get(teams_str[:3], teams_str[:3])
     
-    # Cache the result
-    _ticker_cache[ticker] = result.copy()
+    if prop_code:
+        if prop_code in ("TIE", "DRAW"):
+            result["prop"] = prop_code
+            result["prop_full"] = "Tie/Draw"
+        elif prop_code in TEAM_NAMES:
+            result["prop"] = prop_code
+            result["prop_full"] = TEAM_NAMES[prop_code] + " Wins"
+        else:
+            result["prop"] = prop_code
+            result["prop_full"] = prop_code
+        
+        if result["team1_full"] and result["team2_full"]:
+            result["bet_description"] = f"{result['prop_full']} ({result['team1_full']} vs {result['team2_full']})"
+        elif result["team1_full"]:
+            result["bet_description"] = f"{result['prop_full']} ({result['team1_full']} game)"
+
     return result
 
+# Substrings that mark a title / bet description as naming an outcome ("win" also covers "wins")
+TITLE_OUTCOME_RE = re.compile("win|tie|draw|yes|no|over|under")
+DESC_OUTCOME_RE = re.compile("win|tie|draw|yes|no")
+
+@functools.lru_cache(maxsize=1024)
+def vs_pattern(team1_full: str, team2_full: str, separators: str) -> "re.Pattern":
+    """Compiled search for "<team> <separator> <team>" in either order, on lowercased text."""
+    team1_lower = re.escape(team1_full.lower())
+    team2_lower = re.escape(team2_full.lower())
+    return re.compile(f"{team1_lower} (?:{separators}) {team2_lower}|{team2_lower} (?:{separators}) {team1_lower}")
+
 def is_generic_vs_market(ticker_info: dict, market_title: str) -> bool:
     """Check if this is a generic 'team1 vs team2' market without a specific prop/outcome."""
     team1_full = ticker_info.get("team1_full", "").strip()
     team2_full = ticker_info.get("team2_full", "").strip()
-    team1 = ticker_info.get("team1", "").strip()
-    team2 = ticker_info.get("team2", "").strip()
     prop = ticker_info.get("prop", "").strip()
     bet_description = ticker_info.get("bet_description", "").strip()
     
@@ -216,45 +242,28 @@ def is_generic_vs_market(ticker_info: dict, market_title: str) -> bool:
     if not prop:
         return True
     
-    # Check if title is just "team1 vs team2" format
+    if not (team1_full and team2_full):
+        return False
+    
+    # Check if title is just "team1 vs team2" format ("team1 vs team2", "team1 v team2", "team1 - team2")
+    # without outcome info
     title_lower = market_title.lower()
-    if team1_full and team2_full:
-        # Check for patterns like "team1 vs team2", "team1 v team2", "team1 - team2"
-        vs_patterns = [
-            f"{team1_full.lower()} vs {team2_full.lower()}",
-            f"{team1_full.lower()} v {team2_full.lower()}",
-            f"{team1_full.lower()} - {team2_full.lower()}",
-            f"{team2_full.lower()} vs {team1_full.lower()}",
-            f"{team2_full.lower()} v {team1_full.lower()}",
-            f"{team2_full.lower()} - {team1_full.lower()}"
-        ]
-        if any(pattern in title_lower for pattern in vs_patterns):
-            # If title is just the vs pattern without additional outcome info, it's generic
-            # Check if title doesn't contain outcome keywords
-            outcome_keywords = ["wins", "win", "tie", "draw", "yes", "no", "over", "under"]
-            if not any(keyword in title_lower for keyword in outcome_keywords):
-                return True
+    if vs_pattern(team1_full, team2_full, "vs|v|-").search(title_lower):
+        if not TITLE_OUTCOME_RE.search(title_lower):
+            return True
     
     # Check bet_description - if it's just "team1 vs team2" without outcome, it's generic
     if bet_description:
         desc_lower = bet_description.lower()
-        if team1_full and team2_full:
-            vs_patterns = [
-                f"{team1_full.lower()} vs {team2_full.lower()}",
-                f"{team1_full.lower()} v {team2_full.lower()}",
-                f"{team2_full.lower()} vs {team1_full.lower()}",
-                f"{team2_full.lower()} v {team1_full.lower()}"
-            ]
-            # If description matches vs pattern exactly (or with minimal extra text), it's generic
-            for pattern in vs_patterns:
-                if pattern in desc_lower:
-                    # Check if there's no outcome specified (no "wins", "tie", etc.)
-                    outcome_keywords = ["wins", "win", "tie", "draw", "yes", "no"]
-                    if not any(keyword in desc_lower for keyword in outcome_keywords):
-                        return True
+        if vs_pattern(team1_full, team2_full, "vs|v").search(desc_lower):
+            if not DESC_OUTCOME_RE.search(desc_lower):
+                return True
     
     return False
 
+# Substrings that make a "... wins" description a prop bet rather than a match result ("GOAL" also covers "GOALS")
+WIN_EXCLUDE_RE = re.compile("FIRST|GOAL|OVER|UNDER|TOTAL|SCORE|CLEAN|SHUTOUT")
+
 def is_match_result_market(ticker_info: dict, ticker: str) -> bool:
     """Check if this is a match result market (Team Wins or Tie/Draw), not other prop bets."""
     prop = ticker_info.get("prop", "").upper()
@@ -267,34 +276,20 @@ def is_match_result_market(ticker_info: dict, ticker: str) -> bool:
     # Exclude other props like: over/under, first goal, total goals, etc.
     
     # Check if it's a tie/draw market
-    if prop in ["TIE", "DRAW"] or "TIE" in prop_full or "DRAW" in prop_full:
+    if prop in ("TIE", "DRAW") or "TIE" in prop_full or "DRAW" in prop_full:
         return True
     
     # Check if it's a team win market (prop matches team code)
     if prop == team1 or prop == team2:
         return True
     
-    # Check bet description for win patterns
-    if "WINS" in bet_description or "WIN" in bet_description:
-        # Make sure it's not something like "First Goal" or "Over/Under"
-        exclude_patterns = ["FIRST", "GOAL", "OVER", "UNDER", "TOTAL", "SCORE", "CLEAN", "SHUTOUT"]
-        if not any(pattern in bet_description for pattern in exclude_patterns):
-            return True
-    
-    # Exclude common non-match-result markets
-    exclude_keywords = [
-        "OVER", "UNDER", "TOTAL", "GOALS", "FIRST", "LAST", "SCORE", 
-        "CLEAN", "SHUTOUT", "CARD", "CORNER", "PENALTY", "HALF", "MINUTE"
-    ]
-    
-    # If it contains exclude keywords, it's not a match result market
-    if any(keyword in bet_description or keyword in prop_full for keyword in exclude_keywords):
-        return False
-    
-    # If prop matches team codes, it's likely a win market
-    if team1 and team2 and (prop == team1 or prop == team2):
+    # Check bet description for win patterns ("WIN" also covers "WINS"), making sure it's not
+    # something like "First Goal" or "Over/Under"
+    if "WIN" in bet_description and not WIN_EXCLUDE_RE.search(bet_description):
         return True
     
+    # Anything else - including other props like over/under, cards, corners or halves - is not
+    # a match result market
     return False
 
 def process_market(market: dict, ticker: str) -> dict:
@@ -303,20 +298,23 @@ def process_market(market: dict, ticker: str) -> dict:
         # Parse ticker info (cached)
         ticker_info = parse_ticker(ticker)
         
-        # Extract market data early to check title
-        market_id = market.get("market_id", "")
-        market_title = market.get("title", ticker_info.get("bet_description", ticker))
-        market_subtitle = market.get("subtitle", "")
-        status = market.get("status", "unknown")
+        # Only include match result markets (Team Wins, Tie/Draw)
+        # Exclude other prop bets like over/under, first goal, etc.
+        # Checked first: it only needs the parsed ticker and rejects most candidates
+        if not is_match_result_market(ticker_info, ticker):
+            return None
+        
+        # The parsed description is only a fallback, so don't look it up when there's a title
+        market_title = market["title"] if "title" in market else ticker_info.get("bet_description", ticker)
         
         # Filter out generic "team1 vs team2" markets (without specific prop/outcome)
         if is_generic_vs_market(ticker_info, market_title):
             return None
         
-        # Only include match result markets (Team Wins, Tie/Draw)
-        # Exclude other prop bets like over/under, first goal, etc.
-        if not is_match_result_market(ticker_info, ticker):
-            return None
+        # Extract the remaining market data only for markets that are kept
+        market_id = market.get("market_id", "")
+        market_subtitle = market.get("subtitle", "")
+        status = market.get("status", "unknown")
         
         # Get pricing info - optimized to check most common fields first
         yes_price = 0
@@ -349,11 +347,9 @@ def process_market(market: dict, ticker: str) -> dict:
         volume = market.get("volume", 0)
         open_interest = market.get("open_interest", 0)
         
-        # Build URL - optimized string operations
+        # Build URL from the game's (cached) base ticker - the ticker without its prop part
         if ticker:
-            ticker_parts = ticker.split('-')
-            url_ticker = '-'.join(ticker_parts[:2]).lower() if len(ticker_parts) >= 2 else ticker.lower()
-            market_url = f"https://kalshi.com/markets/kxeplgame/english-premier-league-game/{url_ticker}"
+            market_url = MARKET_URL_PREFIX + extract_base_ticker(ticker).lower()
         else:
             market_url = None
         
@@ -373,6 +369,21 @@ def process_market(market: dict, ticker: str) -> dict:
     except Exception:
         return None
 
+def write_json(payload: dict):
+    """Writes payload to stdout as one line of JSON, serialized with orjson when available."""
+    if HAVE_ORJSON:
+        try:
+            data = orjson.dumps(payload)
+        except TypeError:
+            pass
+        else:
+            # Anything already printed through the text layer has to go out first
+            sys.stdout.flush()
+            sys.stdout.buffer.write(data + b"\n")
+            sys.stdout.flush()
+            return
+    print(json.dumps(payload))
+
 def main():
     """Main function to fetch and format markets."""
     # Parse command line arguments for limit
@@ -387,7 +398,7 @@ def main():
             "error": "API credentials not found. Check your .env file.",
             "markets": []
         }
-        print(json.dumps(error_response))
+        write_json(error_response)
         sys.exit(1)
 
     try:
@@ -401,7 +412,7 @@ def main():
             "error": f"Error loading private key: {str(e)}",
             "markets": []
         }
-        print(json.dumps(error_response))
+        write_json(error_response)
         sys.exit(1)
 
     try:
@@ -410,46 +421,75 @@ def main():
             private_key=private_key,
             environment=env
         )
+        # Every request below (pages and related searches) goes through this one client's
+        # keep-alive connection pool; close it once the script is done
+        atexit.register(client.close)
     except Exception as e:
         error_response = {
             "error": f"Failed to initialize Kalshi client: {str(e)}",
             "markets": []
         }
-        print(json.dumps(error_response))
+        write_json(error_response)
         sys.exit(1)
 
+    # Without a limit every page up to max_pages is read, so the next one is requested in the
+    # background while the current one is filtered (with a limit we may stop early instead).
+    # Related-market searches share one pool for the whole run; both are shut down in the
+    # finally below however the fetch ends
+    page_pool = ThreadPoolExecutor(max_workers=1) if not limit else None
+    related_pool = ThreadPoolExecutor(max_workers=RELATED_SEARCH_WORKERS)
+
     # Fetch markets and filter for EPL games
     # OPTIMIZED: Use ticker filter to reduce data fetched, concurrent requests when possible
     try:
         epl_markets = []
         seen_tickers = set()
+        searched_bases = set()  # Base tickers (games) whose related markets were already searched
         sample_tickers = []
-        all_markets = []
+        markets_searched = 0  # Only the count of scanned markets is needed, not the markets themselves
         cursor = None
         max_pages = 2 if limit else 10  # Even fewer pages if we have a limit (for speed)
         page_count = 0
         max_markets_to_search = limit * 15 if limit else 5000  # Search up to 15x limit for EPL markets (reduced for speed)
+        # Let the API filter down to the EPL game series so pages don't carry every other market
+        # (falls back to unfiltered pages below if the series comes back empty)
+        page_params = {
+            "limit": 500,  # Max per page
+            "series_ticker": EPL_SERIES_TICKER
+        }
+        next_page = None
         
         # Start with general market fetch - the ticker filter might be too restrictive
         # We'll filter for EPL markets in the processing loop
         
         # If we don't have enough markets, continue with pagination
         # Fetch markets with pagination, stop early if we have enough EPL markets
-        while page_count < max_pages and len(all_markets) < max_markets_to_search:
+        while page_count < max_pages and markets_searched < max_markets_to_search:
             if limit and len(epl_markets) >= limit:
                 break
             try:
-                params = {
-                    "limit": 500  # Max per page
-                }
+                params = dict(page_params)
                 if cursor:
                     params["cursor"] = cursor
                 
-                response = client.get_markets(**params)
+                if next_page is not None:
+                    response = next_page.result()
+                    next_page = None
+                else:
+                    response = client.get_markets(**params)
+                
+                if "series_ticker" in page_params and not cursor and not response.get("markets"):
+                    # Nothing in the EPL game series - scan all markets instead
+                    del page_params["series_ticker"]
+                    continue
                 
                 if "markets" in response:
                     markets = response["markets"]
-                    all_markets.extend(markets)
+                    markets_searched += len(markets)
+                    
+                    if (page_pool and response.get("cursor") and page_count + 1 < max_pages
+                            and markets_searched < max_markets_to_search):
+                        next_page = page_pool.submit(client.get_markets, cursor=response["cursor"], **page_params)
                     
                     # Filter for EPL games as we go (for early stopping)
                     # OPTIMIZATION: Use faster EPL detection (check most common patterns first)
@@ -458,14 +498,13 @@ def main():
                         if not ticker or ticker in seen_tickers:
                             continue
                         
-                        # Fast EPL detection - check most common patterns first
-                        ticker_upper = ticker.upper()
-                        is_epl = (
-                            ticker_upper.startswith("KXEPL") or  # Most common, check first
-                            ticker_upper.startswith("EPL") or
-                            "KXEPLGAME" in ticker_upper or
-                            "EPLGAME" in ticker_upper
-                        )
+                        # Fast EPL detection - Kalshi tickers are upper case, so the common
+                        # KXEPL.../EPL... prefix is checked before allocating an uppercased copy
+                        is_epl = ticker.startswith(EPL_TICKER_PREFIXES)
+                        if not is_epl:
+                            ticker_upper = ticker.upper()
+                            # "EPLGAME" also covers "KXEPLGAME"
+                            is_epl = ticker_upper.startswith(EPL_TICKER_PREFIXES) or "EPLGAME" in ticker_upper
                         
                         # Only check title if ticker doesn't match (slower check)
                         if not is_epl:
@@ -473,8 +512,7 @@ def main():
                             is_epl = (
                                 "PREMIER-LEAGUE" in ticker_upper or
                                 "PREMIERLEAGUE" in ticker_upper or
-                                "PREMIER LEAGUE" in title or
-                                ("PREMIER" in title and "LEAGUE" in title)
+                                ("PREMIER" in title and "LEAGUE" in title)  # Also covers "PREMIER LEAGUE"
                             )
                         
                         # Collect sample tickers for debugging
@@ -499,9 +537,13 @@ def main():
                                         team_codes.append(ticker_info["team2"])
                                     
                                     # Find related markets (other outcomes for same game)
-                                    # Only search if we have team codes to avoid unnecessary API calls
-                                    if team_codes:
-                                        related = find_related_markets(client, base_ticker, seen_tickers, team_codes)
+                                    # Only search if we have team codes to avoid unnecessary API calls,
+                                    # and only once per game: every market a search finds is marked seen,
+                                    # so repeating it for another outcome of the same game finds nothing new
+                                    if team_codes and base_ticker not in searched_bases:
+                                        searched_bases.add(base_ticker)
+                                        related = find_related_markets(client, base_ticker, seen_tickers, team_codes,
+                                                                       related_pool)
                                         for related_market in related:
                                             related_ticker = related_market.get("ticker", "")
                                             if related_ticker and related_ticker not in seen_tickers:
@@ -549,14 +591,14 @@ def main():
             "error": None,
             "markets": epl_markets,
             "debug": {
-                "total_markets_searched": len(all_markets),
+                "total_markets_searched": markets_searched,
                 "epl_markets_found": len(epl_markets),
                 "pages_fetched": page_count + 1,
                 "sample_tickers": sample_tickers[:10]
             }
         }
         
-        print(json.dumps(response_data))
+        write_json(response_data)
         
     except Exception as e:
         # Return error but don't exit with error code if we got some markets
@@ -568,10 +610,14 @@ def main():
                 "markets_found": len(epl_markets) if 'epl_markets' in locals() else 0
             }
         }
-        print(json.dumps(error_response))
+        write_json(error_response)
         # Exit with error code only if we got no markets
         if 'epl_markets' not in locals() or len(epl_markets) == 0:
             sys.exit(1)
+    finally:
+        if page_pool:
+            page_pool.shutdown(wait=False)
+        related_pool.shutdown(wait=False)
 
 if __name__ == "__main__":
     main()
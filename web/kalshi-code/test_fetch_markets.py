@@ -0,0 +1,36 @@
+"""Tests for fetch_markets.py; run from this directory with `python -m unittest`."""
+import unittest
+
+from fetch_markets import fetch_and_format
+
+
+class FakeClient:
+    """Stands in for KalshiHttpClient, returning the same markets for every search."""
+    def __init__(self, markets):
+        self.markets = markets
+
+    def get_markets(self, **params):
+        return {"markets": self.markets}
+
+
+class MixedPriceShapesTest(unittest.TestCase):
+    def test_each_market_uses_its_own_highest_priority_price_field(self):
+        markets = [
+            {"ticker": "KXEPLGAME-25NOV08CFCWOL-CFC", "yes_bid": 45, "no_bid": 55},
+            {"ticker": "KXEPLGAME-25NOV08CFCWOL-WOL", "yes_bid_dollars": 0.31, "yes_bid": 30,
+             "no_bid_dollars": 0.69, "no_bid": 70},
+            {"ticker": "KXEPLGAME-25NOV08CFCWOL-TIE", "yes_price": 20, "no_price": 80},
+            {"ticker": "KXEPLGAME-25NOV09ARSTOT-ARS"},
+        ]
+        result = fetch_and_format(FakeClient(markets))
+        prices = {m["ticker"]: (m["yes_price"], m["no_price"]) for m in result["markets"]}
+        self.assertEqual(prices, {
+            "KXEPLGAME-25NOV08CFCWOL-CFC": (0.45, 0.55),
+            "KXEPLGAME-25NOV08CFCWOL-WOL": (0.31, 0.69),
+            "KXEPLGAME-25NOV08CFCWOL-TIE": (0.2, 0.8),
+            "KXEPLGAME-25NOV09ARSTOT-ARS": (0, 0),
+        })
+
+
+if __name__ == "__main__":
+    unittest.main()